@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.accounts'
\ No newline at end of file
+    name = 'apps.accounts'
+
+    def ready(self):
+        # Регистрирует расширение drf-spectacular для ClaimsJWTAuthentication
+        import apps.accounts.schema  # noqa: F401
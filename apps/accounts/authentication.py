@@ -0,0 +1,196 @@
+import time
+
+from django.conf import settings
+from django.db import router
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.accounts.models import AUTH_USER_CACHE_KEY, User
+from apps.sellers.models import Seller
+
+AUTH_VERSION_CLAIM = "auth_version"
+# Хеш пароля и last_login в снимок не попадают: запросам по токену они не нужны,
+# у восстановленного пользователя эти поля отложенные (догружаются при обращении)
+SNAPSHOT_EXCLUDED_FIELDS = ("password", "last_login")
+USER_FIELDS = [field.attname for field in User._meta.concrete_fields if field.attname not in SNAPSHOT_EXCLUDED_FIELDS]
+SELLER_FIELDS = [field.attname for field in Seller._meta.concrete_fields]
+
+
+class AuthCacheStats:
+    """Hits/misses of the user snapshot cache and the time spent loading (process-wide)"""
+
+    def __init__(self):
+        self.hits = self.misses = 0
+        self.hit_time = self.miss_time = 0.0
+
+    def record(self, hit, duration):
+        if hit:
+            self.hits += 1
+            self.hit_time += duration
+        else:
+            self.misses += 1
+            self.miss_time += duration
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    @property
+    def saved_ms(self):
+        """Estimated DB time saved: hits x (mean miss load - mean hit load)"""
+        if not self.hits or not self.misses:
+            return 0.0
+        return self.hits * (self.miss_time / self.misses - self.hit_time / self.hits) * 1000
+
+
+auth_cache_stats = AuthCacheStats()
+
+
+def set_auth_claims(token, user):
+    """Puts the authorization state of the user (with its seller) into the token payload"""
+    seller = getattr(user, "seller", None)
+    if user.is_staff:
+        token['group'] = 'admin'
+    else:
+        token['group'] = 'user'
+        token['role'] = user.account_type
+    token["account_type"] = user.account_type
+    token["is_staff"] = user.is_staff
+    token["seller_id"] = str(seller.id) if seller else None
+    token["seller_approved"] = bool(seller and seller.is_approved)
+    token[AUTH_VERSION_CLAIM] = user.auth_version
+    return token
+
+
+def load_user_snapshot(user_id, version):
+    """
+    The user with its seller, restored from a cached row snapshot.
+
+    The snapshot is one LEFT JOIN row of raw field values stored with the
+    auth_version it was read at; a snapshot of another version is a miss.
+    The password hash and last_login are left out (deferred on the user).
+    Returns (user, hit).
+    """
+    cache = User._auth_cache()
+    key = AUTH_USER_CACHE_KEY.format(user_id)
+    cached = cache.get(key)
+    hit = cached is not None and cached[0] == version
+    if hit:
+        row = cached[1]
+    else:
+        columns = USER_FIELDS + [f"seller__{name}" for name in SELLER_FIELDS]
+        row = User._base_manager.filter(pk=user_id).values_list(*columns).first()
+        if row is None:
+            raise User.DoesNotExist
+        cache.set(key, (version, row), timeout=settings.AUTH_USER_CACHE_TIMEOUT)
+
+    db = router.db_for_read(User)
+    user = User.from_db(db, USER_FIELDS, row[:len(USER_FIELDS)])
+    seller_row = row[len(USER_FIELDS):]
+    seller = None
+    if seller_row[0] is not None:
+        seller = Seller.from_db(db, SELLER_FIELDS, seller_row)
+        Seller.user.field.set_cached_value(seller, user)
+    User.seller.related.set_cached_value(user, seller)
+    return user, hit
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Request user backed by the signed token claims.
+
+    is_authenticated, pk, is_staff, account_type and the seller state are
+    answered from the claims; the User (with its seller) is restored from the
+    snapshot cache, or loaded, only when a view touches anything else.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, token):
+        user_id = User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+        super().__init__(self._load)
+        # Запись в __dict__ напрямую: setattr у ленивого объекта загрузил бы пользователя
+        self.__dict__["_user_id"] = user_id
+        self.__dict__["claims"] = token.payload
+        # None - пользователь не загружался, иначе (попадание в кэш, время загрузки)
+        self.__dict__["cache_result"] = None
+
+    def _load(self):
+        started = time.perf_counter()
+        user, hit = load_user_snapshot(self._user_id, self.claims[AUTH_VERSION_CLAIM])
+        duration = time.perf_counter() - started
+        auth_cache_stats.record(hit, duration)
+        self.__dict__["cache_result"] = (hit, duration)
+        return user
+
+    # isinstance() и сравнение с моделями без загрузки пользователя
+    @property
+    def __class__(self):
+        return User
+
+    @property
+    def _meta(self):
+        return User._meta
+
+    @property
+    def pk(self):
+        return self._user_id
+
+    id = pk
+
+    @property
+    def is_staff(self):
+        return self.claims["is_staff"]
+
+    @property
+    def account_type(self):
+        return self.claims["account_type"]
+
+    @property
+    def seller_id(self):
+        seller_id = self.claims["seller_id"]
+        return User._meta.pk.to_python(seller_id) if seller_id else None
+
+    @property
+    def seller_approved(self):
+        return self.claims["seller_approved"]
+
+    def __eq__(self, other):
+        if not isinstance(other, User):
+            return NotImplemented
+        return self.pk == other.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a per-request User query.
+
+    The claims are trusted while their auth_version matches the cached
+    version of the user (User.current_auth_version); a changed role, staff
+    flag or seller approval bumps the version, and such tokens are rejected
+    until refreshed. Tokens issued before the claims existed load the User
+    as before.
+    """
+
+    def get_user(self, validated_token):
+        if AUTH_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        version = User.current_auth_version(user_id)
+        if version is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if version != validated_token[AUTH_VERSION_CLAIM]:
+            raise AuthenticationFailed(_("Token claims are outdated, refresh the token"), code="claims_outdated")
+        return ClaimsUser(validated_token)
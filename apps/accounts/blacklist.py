@@ -0,0 +1,143 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.db.models import Max
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+# Счётчик добавлений в чёрный список, общий для процессов (при общем кэше)
+BLACKLIST_GENERATION_KEY = "token_blacklist:generation"
+MIN_CAPACITY = 10_000
+# Бэкенды, где incr атомарен и виден всем процессам: только им доверяем счётчик поколений
+SHARED_COUNTER_BACKENDS = (BaseMemcachedCache, RedisCache)
+
+
+class BloomFilter:
+    """Bit array with k hash positions per item: no false negatives, error_rate false positives at capacity"""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(int(-capacity * math.log(error_rate) / math.log(2) ** 2), 8)
+        self.hashes = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        # Двойное хеширование: k позиций из двух половин одного blake2b
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & 1 << (position & 7) for position in self.positions(item))
+
+
+class BlacklistFilter:
+    """
+    In-process Bloom filter over the jti of unexpired blacklisted tokens.
+
+    Rebuilt from the table every TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL
+    seconds (which also drops expired entries and resizes it). Tokens
+    blacklisted in between are added right away in this process and other
+    processes load the rows after the last seen id. With a shared cache
+    (Redis/Memcached) they do so only when a generation counter in the
+    cache moved; with any other cache every check runs that primary-key
+    range query, so a token blacklisted in another worker is never missed.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.bloom = None
+        self.built_at = 0.0
+        self.last_id = 0
+        self.generation = None
+
+    @staticmethod
+    def _cache():
+        return caches[settings.TOKEN_BLACKLIST_FILTER_CACHE_ALIAS]
+
+    def _shared_generation(self):
+        """The generation counter of the cache, None if the cache is not shared between processes"""
+        cache = self._cache()
+        if not isinstance(cache, SHARED_COUNTER_BACKENDS):
+            return None
+        # 0: ключа ещё нет, иначе None совпал бы с «кэш не общий»
+        return cache.get(BLACKLIST_GENERATION_KEY, 0)
+
+    def rebuild(self):
+        generation = self._shared_generation()
+        last_id = BlacklistedToken.objects.aggregate(last_id=Max("id"))["last_id"] or 0
+        rows = BlacklistedToken.objects.filter(id__lte=last_id, token__expires_at__gt=aware_utcnow())
+        jtis = list(rows.values_list("token__jti", flat=True))
+        bloom = BloomFilter(max(len(jtis) * 2, MIN_CAPACITY), settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+        for jti in jtis:
+            bloom.add(jti)
+        self.bloom, self.last_id, self.generation = bloom, last_id, generation
+        self.built_at = time.monotonic()
+
+    def catch_up(self):
+        """Adds the rows blacklisted by other processes since the last load"""
+        generation = self._shared_generation()
+        if generation is not None and generation == self.generation:
+            return
+        rows = BlacklistedToken.objects.filter(id__gt=self.last_id).values_list("id", "token__jti")
+        for row_id, jti in rows:
+            self.bloom.add(jti)
+            self.last_id = max(self.last_id, row_id)
+        self.generation = generation
+
+    def might_contain(self, jti):
+        with self.lock:
+            if self.bloom is None or time.monotonic() - self.built_at > settings.TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL:
+                self.rebuild()
+            else:
+                self.catch_up()
+            return jti in self.bloom
+
+    def add(self, jti):
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+        cache = self._cache()
+        if not isinstance(cache, SHARED_COUNTER_BACKENDS):
+            return
+        try:
+            generation = cache.incr(BLACKLIST_GENERATION_KEY)
+        except ValueError:
+            # Ключ вытеснен: новое значение не должно совпасть со старыми поколениями
+            generation = int(time.time() * 1000)
+            cache.set(BLACKLIST_GENERATION_KEY, generation, timeout=None)
+        with self.lock:
+            # Своё добавление уже в фильтре, догонять нечего
+            if self.generation is not None and generation == self.generation + 1:
+                self.generation = generation
+
+    def reset(self):
+        with self.lock:
+            self.bloom = None
+
+
+blacklist_filter = BlacklistFilter()
+
+
+class FilteredRefreshToken(RefreshToken):
+    """Refresh token that checks the blacklist table only when the Bloom filter reports a probable hit"""
+
+    def check_blacklist(self):
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
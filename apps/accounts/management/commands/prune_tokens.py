@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Deletes expired outstanding refresh tokens with their blacklist entries in bounded batches "
+        "(run periodically)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by("id").values_list("id", flat=True)
+        pruned = 0
+        while True:
+            # Каждая пачка - отдельная короткая транзакция, таблица не блокируется надолго
+            with transaction.atomic():
+                ids = list(expired[:options["batch_size"]])
+                if not ids:
+                    break
+                # Записи BlacklistedToken удаляются каскадом
+                OutstandingToken.objects.filter(id__in=ids).delete()
+            pruned += len(ids)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {pruned} expired tokens"))
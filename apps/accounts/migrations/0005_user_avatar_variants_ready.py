@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 07:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='avatar_variants_ready',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
@@ -1,16 +1,26 @@
+from django.conf import settings
+from django.core.cache import caches
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractBaseUser
 
 from apps.accounts.managers import CustomUserManager
 from apps.common.models import IsDeletedModel
+from apps.common.thumbnails import ImageVariantsMixin
+from apps.common.versions import bump_versions
 
 ACCOUNT_TYPE_CHOICES = (
     ("SELLER", "SELLER"),
     ("BUYER", "BUYER"),
 )
+# Поля, которые попадают в claims токена: их изменение делает выданные токены устаревшими
+AUTH_CLAIM_FIELDS = ("account_type", "is_staff", "is_active", "is_deleted")
+AUTH_VERSION_CACHE_KEY = "auth:version:{}"
+# Снимок пользователя с продавцом для ClaimsJWTAuthentication
+AUTH_USER_CACHE_KEY = "auth:user:{}"
 
 
-class User(IsDeletedModel, AbstractBaseUser):
+class User(ImageVariantsMixin, IsDeletedModel, AbstractBaseUser):
     """
     Custom user model extending AbstractBaseUser.
 
@@ -19,12 +29,17 @@ class User(IsDeletedModel, AbstractBaseUser):
         last_name (str): The last name of the user.
         email (str): The email address of the user, used as the username field.
         avatar (ImageField): The avatar image of the user.
+        avatar_variants_ready (bool): Whether the thumbnail variants of the avatar are built.
         is_staff (bool): Designates whether the user can log into this admin site.
         is_active (bool): Designates whether this user should be treated as active.
         account_type (str): The type of account (SELLER or BUYER).
+        auth_version (int): Version of the authorization claims, bumped when they change.
 
     Methods:
         full_name(): Returns the full name of the user.
+        current_auth_version(): Returns the cached claims version of a user.
+        bump_auth_version(): Invalidates the claims of tokens issued to a user.
+        invalidate_auth_snapshot(): Drops the cached snapshot of a user and its seller.
         __str__(): Returns the string representation of the user.
 
     """
@@ -33,16 +48,84 @@ class User(IsDeletedModel, AbstractBaseUser):
     last_name = models.CharField(verbose_name="Last name", max_length=25, null=True)
     email = models.EmailField(verbose_name="Email address", unique=True)
     avatar = models.ImageField(upload_to="avatars/", null=True, default='avatars/default.jpg')
+    avatar_variants_ready = models.BooleanField(default=False, editable=False)
 
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     account_type = models.CharField(max_length=6, choices=ACCOUNT_TYPE_CHOICES, default="BUYER")
+    auth_version = models.PositiveIntegerField(default=0, editable=False)
+
+    variant_fields = ("avatar",)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name"]
 
     objects = CustomUserManager()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем значения полей claims на момент загрузки
+        instance._stored_claims = instance._auth_claims()
+        # Аватар продавца показывается в карточках товаров
+        instance._stored_avatar = str(instance.__dict__.get("avatar"))
+        return instance
+
+    def variant_scopes(self):
+        return ["seller"]
+
+    def _auth_claims(self):
+        return tuple(self.__dict__.get(name) for name in AUTH_CLAIM_FIELDS)
+
+    def save(self, *args, **kwargs):
+        stored = getattr(self, "_stored_claims", None)
+        changed = stored is not None and stored != self._auth_claims()
+        if changed:
+            self.auth_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "auth_version"}
+        super().save(*args, **kwargs)
+        if changed:
+            self._auth_cache().delete(AUTH_VERSION_CACHE_KEY.format(self.pk))
+        User.invalidate_auth_snapshot(self.pk)
+        self._stored_claims = self._auth_claims()
+        if getattr(self, "_stored_avatar", None) not in (None, str(self.avatar)):
+            bump_versions("seller")
+        self._stored_avatar = str(self.avatar)
+
+    @staticmethod
+    def _auth_cache():
+        return caches[settings.AUTH_CLAIMS_CACHE_ALIAS]
+
+    @classmethod
+    def current_auth_version(cls, user_id):
+        """
+        Returns the claims version of an active user, None for an inactive or deleted one.
+        Read from the cache, the database is queried only on a miss.
+        """
+        cache = cls._auth_cache()
+        key = AUTH_VERSION_CACHE_KEY.format(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls._base_manager.filter(pk=user_id, is_active=True, is_deleted=False).values_list(
+                "auth_version", flat=True
+            ).first()
+            # -1: пользователя нет или он отключён, тоже кэшируется
+            version = -1 if version is None else version
+            cache.set(key, version, timeout=settings.AUTH_CLAIMS_CACHE_TIMEOUT)
+        return None if version < 0 else version
+
+    @classmethod
+    def bump_auth_version(cls, user_id):
+        """Makes the claims of every token issued to the user outdated"""
+        cls._base_manager.filter(pk=user_id).update(auth_version=F("auth_version") + 1)
+        cls._auth_cache().delete_many([AUTH_VERSION_CACHE_KEY.format(user_id), AUTH_USER_CACHE_KEY.format(user_id)])
+
+    @classmethod
+    def invalidate_auth_snapshot(cls, user_id):
+        """Drops the cached user-plus-seller snapshot after the rows change"""
+        cls._auth_cache().delete(AUTH_USER_CACHE_KEY.format(user_id))
+
     @property
     def full_name(self):
         """
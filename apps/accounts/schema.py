@@ -0,0 +1,7 @@
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """Documents ClaimsJWTAuthentication as the same bearer JWT scheme as simplejwt"""
+
+    target_class = "apps.accounts.authentication.ClaimsJWTAuthentication"
@@ -1,6 +1,13 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer, \
+    TokenVerifySerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import UntypedToken
+
+from apps.accounts.authentication import set_auth_claims
+from apps.accounts.blacklist import FilteredRefreshToken, blacklist_filter
 from apps.accounts.models import User
 
 
@@ -24,15 +31,39 @@ class CreateUserSerializer(serializers.ModelSerializer):
 
 
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = FilteredRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
 
-        # Добавляем пользовательские данные в полезную нагрузку
-        if user.is_staff:
-            token['group'] = 'admin'
-        else:
-            token['group'] = 'user'
-            token['role'] = user.account_type
+        # Добавляем пользовательские данные в полезную нагрузку,
+        # по ним проверяются права без загрузки пользователя
+        return set_auth_claims(token, user)
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.select_related('seller').filter(pk=user_id).first() if user_id else None
+        if user is not None:
+            # Обновляем claims: новый access (и refresh при ротации) получает актуальные права
+            set_auth_claims(refresh, user)
+            attrs = {**attrs, 'refresh': str(refresh)}
+        return super().validate(attrs)
+
 
-        return token
\ No newline at end of file
+class MyTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        token = UntypedToken(attrs['token'])
+        # Токен без jti (JTI_CLAIM = None) не может быть в чёрном списке, как в check_blacklist simplejwt.
+        # В таблицу идём только при вероятном попадании в фильтр Блума
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti is None:
+            return {}
+        if blacklist_filter.might_contain(jti) and BlacklistedToken.objects.filter(token__jti=jti).exists():
+            raise serializers.ValidationError('Token is blacklisted')
+        return {}
@@ -1,3 +1,201 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from drf_spectacular.drainage import GENERATOR_STATS
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from apps.accounts.authentication import ClaimsJWTAuthentication
+from apps.accounts.blacklist import BloomFilter, blacklist_filter
+from apps.accounts.models import AUTH_USER_CACHE_KEY, User
+from apps.common.permissions import IsSeller
+from apps.sellers.models import Seller
+from apps.shop.models import Product
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("Seller", "User", "seller@example.com", "pass", account_type="SELLER")
+        self.seller = Seller.objects.create(user=self.user, business_name="Shop", is_approved=True)
+        self.client = APIClient()
+
+    def obtain_tokens(self):
+        response = self.client.post("/auth/token/", {"email": self.user.email, "password": "pass"})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def authenticate(self, access):
+        request = APIRequestFactory().get("/sellers/products/", HTTP_AUTHORIZATION=f"Bearer {access}")
+        user, _ = ClaimsJWTAuthentication().authenticate(request)
+        request.user = user
+        return request
+
+    def test_authorization_without_queries(self):
+        access = self.obtain_tokens()["access"]
+        self.authenticate(access)  # прогрев кэша версии
+
+        with self.assertNumQueries(0):
+            request = self.authenticate(access)
+            self.assertTrue(IsSeller().has_permission(request, None))
+            self.assertTrue(IsSeller().has_object_permission(request, None, Product(seller=self.seller)))
+            self.assertIsInstance(request.user, User)
+            self.assertEqual(request.user, self.user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(request.user.email, self.user.email)
+            self.assertEqual(request.user.seller, self.seller)
+
+    def test_user_snapshot_cache(self):
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.assertEqual(self.client.get("/profiles/")["X-Auth-Cache"], "miss")
+
+        with self.assertNumQueries(0):
+            request = self.authenticate(access)
+            self.assertEqual(request.user.seller.business_name, "Shop")
+        self.assertEqual(self.client.get("/profiles/")["X-Auth-Cache"], "hit")
+
+        # Изменение профиля сбрасывает снимок
+        response = self.client.put("/profiles/", {"first_name": "New", "last_name": "Name"})
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get("/profiles/")
+        self.assertEqual(response["X-Auth-Cache"], "miss")
+        self.assertEqual(response.data["first_name"], "New")
+
+        self.seller.business_name = "Renamed"
+        self.seller.save()
+        self.assertEqual(self.authenticate(access).user.seller.business_name, "Renamed")
+
+    def test_snapshot_user_saves_only_changed_fields(self):
+        access = self.obtain_tokens()["access"]
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.client.get("/profiles/")
+        cached = User._auth_cache().get(AUTH_USER_CACHE_KEY.format(self.user.pk))
+        self.assertNotIn(self.user.password, cached[1])
+
+        # Пароль сменился после снимка: правка профиля не должна вернуть старый хеш
+        User.objects.filter(pk=self.user.pk).update(password=make_password("changed"))
+        response = self.client.put("/profiles/", {"first_name": "New", "last_name": "Name"})
+        self.assertEqual(response.status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.check_password("changed"))
+        self.assertEqual(user.first_name, "New")
+
+        self.client.delete("/profiles/")
+        user = User.objects.get(pk=self.user.pk)
+        self.assertFalse(user.is_active)
+        self.assertTrue(user.check_password("changed"))
+
+    def test_approval_change_invalidates_claims(self):
+        tokens = self.obtain_tokens()
+        self.authenticate(tokens["access"])
+
+        self.seller.is_approved = False
+        self.seller.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(tokens["access"])
+
+        response = self.client.post("/auth/token/refresh/", {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, 200)
+        request = self.authenticate(response.data["access"])
+        self.assertFalse(IsSeller().has_permission(request, None))
+
+    def test_deactivated_user_is_rejected(self):
+        access = self.obtain_tokens()["access"]
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(access)
+
+    def test_schema_documents_claims_authentication(self):
+        # Старые предупреждения схемы к проверке не относятся
+        with GENERATOR_STATS.silence():
+            schema = SchemaGenerator().get_schema(request=None, public=True)
+        self.assertIn("jwtAuth", schema["components"]["securitySchemes"])
+        operation = schema["paths"]["/profiles/"]["get"]
+        self.assertIn({"jwtAuth": []}, operation["security"])
+
+
+class TokenBlacklistFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.user = User.objects.create_user("Buyer", "User", "buyer@example.com", "pass")
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post("/auth/token/refresh/", {"refresh": token})
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        bloom = BloomFilter(1000, 0.01)
+        items = [f"jti-{index}" for index in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+        self.assertLess(false_positives, 300)
+
+    def test_rotated_token_is_rejected(self):
+        refresh = self.client.post("/auth/token/", {"email": self.user.email, "password": "pass"}).data["refresh"]
+        self.assertEqual(self.refresh(refresh).status_code, 200)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    @mock.patch("apps.accounts.blacklist.SHARED_COUNTER_BACKENDS", (LocMemCache,))
+    def test_unlisted_token_skips_blacklist_table(self):
+        refresh = self.client.post("/auth/token/", {"email": self.user.email, "password": "pass"}).data["refresh"]
+        blacklist_filter.might_contain("warm-up")  # первая сборка фильтра
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.post("/auth/token/verify/", {"token": refresh}).status_code, 200)
+
+    @mock.patch("apps.accounts.blacklist.SHARED_COUNTER_BACKENDS", (LocMemCache,))
+    def test_blacklisted_elsewhere_is_caught_up(self):
+        refresh = self.client.post("/auth/token/", {"email": self.user.email, "password": "pass"}).data["refresh"]
+        blacklist_filter.might_contain("warm-up")
+        # Добавление в другом процессе: строка в таблице и новое поколение в кэше
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+        cache.set("token_blacklist:generation", 1)
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_verify_token_without_jti(self):
+        token = AccessToken.for_user(self.user)
+        del token[api_settings.JTI_CLAIM]
+        with mock.patch.object(api_settings, "JTI_CLAIM", None):
+            response = self.client.post("/auth/token/verify/", {"token": str(token)})
+        self.assertEqual(response.status_code, 200)
+
+    def test_per_process_cache_checks_new_rows(self):
+        refresh = self.client.post("/auth/token/", {"email": self.user.email, "password": "pass"}).data["refresh"]
+        blacklist_filter.might_contain("warm-up")
+        with self.assertNumQueries(1):
+            self.assertFalse(blacklist_filter.might_contain("unlisted"))
+        # Другой процесс с локальным кэшем не может сдвинуть поколение: видна только строка в таблице
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(user=self.user))
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_prune_tokens(self):
+        now = aware_utcnow()
+        for index in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f"expired-{index}", token="t", expires_at=now - timedelta(days=1)
+            )
+            BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(user=self.user, jti="alive", token="t", expires_at=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command("prune_tokens", batch_size=2, stdout=out)
+        self.assertIn("Pruned 5", out.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["alive"])
+        self.assertFalse(BlacklistedToken.objects.exists())
@@ -1,11 +1,9 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
-
-from apps.accounts.views import RegisterAPIView, MyTokenObtainPairView
+from apps.accounts.views import RegisterAPIView, MyTokenObtainPairView, MyTokenRefreshView, MyTokenVerifyView
 
 urlpatterns = [
     path('', RegisterAPIView.as_view(), name='registration'),
     path('token/', MyTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-    path('token/verify/', TokenVerifyView.as_view(), name='token_verify'),
+    path('token/refresh/', MyTokenRefreshView.as_view(), name='token_refresh'),
+    path('token/verify/', MyTokenVerifyView.as_view(), name='token_verify'),
 ]
\ No newline at end of file
@@ -1,15 +1,24 @@
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView, TokenVerifyView
 
 
-from apps.accounts.serializers import CreateUserSerializer, MyTokenObtainPairSerializer
+from apps.accounts.serializers import CreateUserSerializer, MyTokenObtainPairSerializer, MyTokenRefreshSerializer, \
+    MyTokenVerifySerializer
 
 
 class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
+class MyTokenRefreshView(TokenRefreshView):
+    serializer_class = MyTokenRefreshSerializer
+
+
+class MyTokenVerifyView(TokenVerifyView):
+    serializer_class = MyTokenVerifySerializer
+
+
 class RegisterAPIView(APIView):
     serializer_class = CreateUserSerializer
 
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Кэш в памяти процесса: значения не видны другим воркерам
+PER_PROCESS_CACHE_BACKENDS = ("django.core.cache.backends.locmem.LocMemCache",)
+
+
+@register(Tags.caches, deploy=True)
+def check_versions_cache(app_configs, **kwargs):
+    """
+    The catalog version counters must live in a cache shared by all workers:
+    with a per-process cache a write in one worker does not bump the counters
+    of the others, and they keep answering 304 and serving cached listings.
+    A deploy check, so tests and runserver keep the local memory cache.
+    """
+    alias = settings.VERSIONS_CACHE_ALIAS
+    backend = settings.CACHES.get(alias, {}).get("BACKEND")
+    if backend in PER_PROCESS_CACHE_BACKENDS:
+        return [
+            Error(
+                f"VERSIONS_CACHE_ALIAS points to the per-process cache {alias!r} ({backend}).",
+                hint="Configure a cache shared by all processes (Redis, Memcached) for this alias.",
+                id="common.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,60 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def keyset_iterator(queryset, chunk_size=2000):
+    """
+    Iterates over a .values() queryset (must include "id") chunk by chunk
+    with WHERE id > last_id ORDER BY id, so every chunk costs the same
+    regardless of how far the export has got and memory stays flat.
+    """
+    queryset = queryset.order_by("id")
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None else queryset.filter(id__gt=last_id)
+        count = 0
+        for row in chunk[:chunk_size].iterator(chunk_size=chunk_size):
+            count += 1
+            last_id = row["id"]
+            yield row
+        if count < chunk_size:
+            return
+
+
+class Echo:
+    """Pseudo-buffer: csv.writer returns each written line instead of storing it"""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows, columns):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([row[column] for column in columns])
+
+
+def iter_ndjson(rows, columns):
+    for row in rows:
+        yield json.dumps({column: row[column] for column in columns}, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n"
+
+
+def iter_export(rows, columns, export_format):
+    if export_format == "csv":
+        return iter_csv(rows, columns)
+    return iter_ndjson(rows, columns)
+
+
+def export_response(rows, columns, export_format, filename):
+    response = StreamingHttpResponse(iter_export(rows, columns, export_format), content_type=EXPORT_FORMATS[export_format])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{export_format}"'
+    return response
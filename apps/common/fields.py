@@ -0,0 +1,72 @@
+from functools import reduce
+from operator import or_
+
+from autoslug import AutoSlugField
+from autoslug.utils import crop_slug, get_prepopulated_value
+from django.db.models import Q
+
+SLUG_ALLOCATED_ATTR = "_slug_allocated"
+
+
+class BulkAutoSlugField(AutoSlugField):
+    """
+    AutoSlugField, который не проверяет уникальность построчно, если slug
+    уже выделен пачкой через assign_unique_slugs (импорт, генерация данных).
+    """
+
+    def pre_save(self, instance, add):
+        if add and getattr(instance, SLUG_ALLOCATED_ATTR, False):
+            return self.value_from_object(instance)
+        return super().pre_save(instance, add)
+
+
+def _suffixed(field, base, index):
+    # Та же схема, что у autoslug: base, base-2, base-3, ... с обрезкой до max_length
+    tail = f"{field.index_sep}{index}"
+    return f"{base[:field.max_length - len(tail)]}{tail}"
+
+
+def assign_unique_slugs(instances, field_name="slug", chunk_size=100):
+    """
+    Assigns unique slugs to unsaved instances in a couple of queries per batch
+    instead of one uniqueness probe per row.
+
+    Args:
+        instances (list): Unsaved instances of one model.
+        field_name (str): The BulkAutoSlugField to fill.
+        chunk_size (int): How many colliding bases go into one LIKE query.
+    """
+    if not instances:
+        return
+    model = type(instances[0])
+    field = model._meta.get_field(field_name)
+    manager = model._base_manager
+
+    bases = []
+    for instance in instances:
+        value = get_prepopulated_value(field, instance)
+        slug = field.slugify(value) if value else ""
+        slug = field.slugify(crop_slug(field, slug)) if slug else model._meta.model_name
+        bases.append(slug)
+
+    unique_bases = set(bases)
+    taken = set(manager.filter(**{f"{field_name}__in": unique_bases}).values_list(field_name, flat=True))
+    # Для занятых (в БД или внутри пачки) баз подгружаем уже выданные суффиксы
+    seen, colliding = set(), set()
+    for base in bases:
+        if base in taken or base in seen:
+            colliding.add(base)
+        seen.add(base)
+    colliding = sorted(colliding)
+    for start in range(0, len(colliding), chunk_size):
+        lookups = [Q(**{f"{field_name}__startswith": base}) for base in colliding[start:start + chunk_size]]
+        taken.update(manager.filter(reduce(or_, lookups)).values_list(field_name, flat=True))
+
+    for instance, base in zip(instances, bases):
+        slug, index = base, 1
+        while slug in taken:
+            index += 1
+            slug = _suffixed(field, base, index)
+        taken.add(slug)
+        setattr(instance, field_name, slug)
+        setattr(instance, SLUG_ALLOCATED_ATTR, True)
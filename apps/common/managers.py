@@ -31,21 +31,23 @@ class IsDeletedQuerySet(GetOrNoneQuerySet):
 
 
 class IsDeletedManager(GetOrNoneManager):
+    queryset_class = IsDeletedQuerySet
+
     def get_queryset(self):
-        return IsDeletedQuerySet(self.model).filter(is_deleted=False)
+        return self.queryset_class(self.model).filter(is_deleted=False)
 
     def get_deleted(self, **kwargs):
         """Get, но только для скрытых объектов
         Использую только для отзывов"""
         try:
-            return IsDeletedQuerySet(self.model).select_related("product", "user").get(is_deleted=True, **kwargs)
+            return self.queryset_class(self.model).select_related("product", "user").get(is_deleted=True, **kwargs)
         except self.model.DoesNotExist:
             return None
 
     def unfiltered(self,**kwargs):
         """Аналог get() для всех записей"""
         try:
-            return IsDeletedQuerySet(self.model).get(**kwargs)
+            return self.queryset_class(self.model).get(**kwargs)
         except self.model.DoesNotExist:
             return None
 
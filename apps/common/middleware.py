@@ -0,0 +1,134 @@
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from apps.accounts.authentication import auth_cache_stats
+
+logger = logging.getLogger("apps.queries")
+
+# Списки параметров IN (%s, %s, ...) разной длины - один и тот же запрос
+IN_LIST_RE = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+NUMBER_RE = re.compile(r"\b\d+\b")
+SPACES_RE = re.compile(r"\s+")
+
+
+class RepeatedQueriesError(AssertionError):
+    """A query fingerprint repeated above QUERY_COUNT_REPEAT_LIMIT in strict mode (likely N+1)"""
+
+
+def fingerprint(sql):
+    sql = IN_LIST_RE.sub("(...)", sql)
+    sql = NUMBER_RE.sub("?", sql)
+    return SPACES_RE.sub(" ", sql).strip()
+
+
+class QueryStats:
+    """Collects query count, DB time and fingerprints via connection.execute_wrapper"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def repeated(self, limit):
+        return [(sql, times) for sql, times in self.fingerprints.most_common() if times > limit]
+
+
+class QueryCountMiddleware:
+    """
+    Per-request SQL instrumentation for the API apps (QUERY_COUNT_PATH_PREFIXES).
+
+    Adds X-DB-Query-Count / X-DB-Time-Ms / Server-Timing headers and logs one
+    JSON line to the "apps.queries" logger. A fingerprint (SQL with parameters
+    and IN-lists collapsed) seen more than QUERY_COUNT_REPEAT_LIMIT times is
+    logged as a warning, and raises RepeatedQueriesError when
+    QUERY_COUNT_STRICT is on (API tests), so an N+1 fails the test.
+
+    A view class may override the limit with a query_repeat_limit attribute
+    (None disables the check) when per-row queries are intended.
+
+    When the request user was restored by ClaimsJWTAuthentication, the
+    snapshot cache result is reported too: X-Auth-Cache hit/miss, an auth
+    entry in Server-Timing and the process-wide hit rate and estimated
+    saved DB time in the log line.
+
+    Queries run while a StreamingHttpResponse is consumed (exports) are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, "view_class", None)
+        if view_class is not None and hasattr(view_class, "query_repeat_limit"):
+            request._query_repeat_limit = view_class.query_repeat_limit
+
+    def __call__(self, request):
+        if not request.path.startswith(tuple(settings.QUERY_COUNT_PATH_PREFIXES)):
+            return self.get_response(request)
+
+        stats = QueryStats()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+
+        duration_ms = round(stats.duration * 1000, 2)
+        response["X-DB-Query-Count"] = str(stats.count)
+        response["X-DB-Time-Ms"] = str(duration_ms)
+        response["Server-Timing"] = f"db;dur={duration_ms}"
+        auth_cache = self.auth_cache_result(request)
+        if auth_cache is not None:
+            response["X-Auth-Cache"] = "hit" if auth_cache["hit"] else "miss"
+            response["Server-Timing"] += f", auth;dur={auth_cache['load_ms']}"
+
+        limit = getattr(request, "_query_repeat_limit", settings.QUERY_COUNT_REPEAT_LIMIT)
+        repeated = stats.repeated(limit) if limit is not None else []
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_time_ms": duration_ms,
+            "repeated": [{"sql": sql, "count": times} for sql, times in repeated],
+        }
+        if auth_cache is not None:
+            record["auth_cache"] = auth_cache
+        logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record, ensure_ascii=False))
+
+        if repeated and settings.QUERY_COUNT_STRICT:
+            sql, times = repeated[0]
+            raise RepeatedQueriesError(
+                f"{request.method} {request.path}: query repeated {times} times (limit {limit}), possible N+1: {sql}"
+            )
+        return response
+
+    @staticmethod
+    def auth_cache_result(request):
+        # Через __dict__, чтобы не загружать ленивого пользователя, если view его не трогал
+        user = getattr(request, "user", None)
+        result = vars(user).get("cache_result") if hasattr(user, "__dict__") else None
+        if result is None:
+            return None
+        hit, duration = result
+        return {
+            "hit": hit,
+            "load_ms": round(duration * 1000, 3),
+            "hit_rate": round(auth_cache_stats.hit_rate, 3),
+            "saved_ms": round(auth_cache_stats.saved_ms, 2),
+        }
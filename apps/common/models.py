@@ -1,8 +1,8 @@
-import uuid
 from django.db import models
 from django.utils import timezone
 
 from apps.common.managers import IsDeletedManager, GetOrNoneManager
+from apps.common.utils import uuid7
 
 
 class BaseModel(models.Model):
@@ -10,12 +10,12 @@ class BaseModel(models.Model):
     A base model class that includes common fields and methods for all models.
 
     Attributes:
-        id (UUIDField): Unique identifier for the model instance.
+        id (UUIDField): Unique time-ordered (v7) identifier, -id means newest first.
         created_at (DateTimeField): Timestamp when the instance was created.
         updated_at (DateTimeField): Timestamp when the instance was last updated.
     """
 
-    id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
+    id = models.UUIDField(default=uuid7, primary_key=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -1,6 +1,144 @@
-from rest_framework.pagination import PageNumberPagination
+import json
 
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination, _reverse_ordering
+
+MAX_PAGE_SIZE = 100  # Жёсткий предел размера страницы для всех списков
 
 class CustomPagination(PageNumberPagination):
     page_size_query_param = 'page_size'  # Параметр запроса для изменения размера страницы
-    max_page_size = 100  # Максимально допустимый размер страницы
\ No newline at end of file
+    max_page_size = MAX_PAGE_SIZE  # Максимально допустимый размер страницы
+
+
+class CustomCursorPagination(CursorPagination):
+    """
+    Keyset-пагинация: без COUNT(*) и OFFSET, стоимость страницы не зависит от её глубины.
+    Включается параметром ?cursor= (пустое значение - первая страница),
+    порядок выбирается через ?ordering= из allowed_orderings.
+
+    В отличие от CursorPagination, позиция курсора составная - значения всех
+    полей сортировки (например price_current и id), поэтому она уникальна и
+    одинаковые цены не превращаются в OFFSET.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = MAX_PAGE_SIZE
+    ordering_query_param = 'ordering'
+    ordering = ('-created_at', '-id')
+    # Последнее поле - уникальный тай-брейкер, чтобы порядок и позиция были полными
+    allowed_orderings = {
+        # id - UUID v7, упорядочен по времени создания и уникален: курсор без тай-брейкера
+        'id': ('id',),
+        '-id': ('-id',),
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+        'price_current': ('price_current', 'id'),
+        '-price_current': ('-price_current', '-id'),
+    }
+
+    def get_ordering(self, request, queryset, view):
+        value = request.query_params.get(self.ordering_query_param)
+        return self.allowed_orderings.get(value, self.ordering)
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = [
+            instance[field.lstrip('-')] if isinstance(instance, dict) else getattr(instance, field.lstrip('-'))
+            for field in ordering
+        ]
+        return json.dumps([str(value) for value in values])
+
+    def keyset_filter(self, model, position, reverse):
+        """(f1 > v1) OR (f1 = v1 AND f2 > v2) ... с учётом направления каждого поля"""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            attr = field.lstrip('-')
+            # Курсор приходит от клиента: кривое значение - 404, а не ошибка БД
+            try:
+                value = model._meta.get_field(attr).to_python(value)
+            except (ValidationError, ValueError, TypeError):
+                raise NotFound(self.invalid_cursor_message)
+            lookup = 'lt' if field.startswith('-') != reverse else 'gt'
+            condition |= Q(**equal, **{f'{attr}__{lookup}': value})
+            equal[attr] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # Позиции уникальны, поэтому выданные курсоры не содержат offset:
+        # присланный вручную вернул бы OFFSET-сканирование
+        if offset:
+            raise NotFound(self.invalid_cursor_message)
+        if current_position is not None:
+            queryset = queryset.filter(self.keyset_filter(queryset.model, current_position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class CursorPaginationMixin:
+    """
+    Выбирает пагинатор для APIView: курсорный, если в запросе есть ?cursor=,
+    иначе постраничный pagination_class.
+    """
+    pagination_class = CustomPagination
+    cursor_pagination_class = CustomCursorPagination
+
+    def get_paginator(self, request):
+        if self.cursor_pagination_class.cursor_query_param in request.query_params:
+            return self.cursor_pagination_class()
+        return self.pagination_class()
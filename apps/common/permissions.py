@@ -1,6 +1,19 @@
 from rest_framework import permissions
 
 
+def seller_state(user):
+    """
+    (seller_id, is_approved) of the request user.
+    From the token claims when present, otherwise from the loaded seller.
+    """
+    if hasattr(user, "claims"):
+        return user.seller_id, user.seller_approved
+    seller = getattr(user, "seller", None)
+    if seller is None:
+        return None, False
+    return seller.id, seller.is_approved
+
+
 class IsOwner(permissions.BasePermission):
     def has_permission(self, request, view):
         if request.user.is_authenticated:
@@ -8,14 +21,15 @@ class IsOwner(permissions.BasePermission):
         return False
 
     def has_object_permission(self, request, view, obj):
-        return obj.user == request.user or request.user.is_staff
+        return obj.user_id == request.user.pk or request.user.is_staff
 
 
 class IsSeller(permissions.BasePermission):
     def has_permission(self, request, view):
-        if (request.user.is_authenticated and request.user.account_type == 'SELLER' and request.user.seller.is_approved) or request.user.is_staff:
+        user = request.user
+        if user.is_authenticated and user.is_staff:
             return True
-        return False
+        return user.is_authenticated and user.account_type == 'SELLER' and seller_state(user)[1]
 
     def has_object_permission(self, request, view, obj):
-        return obj.seller == request.user.seller or request.user.is_staff
\ No newline at end of file
+        return obj.seller_id == seller_state(request.user)[0] or request.user.is_staff
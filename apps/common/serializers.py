@@ -0,0 +1,81 @@
+from operator import attrgetter
+
+from django.conf import settings
+from drf_spectacular.utils import extend_schema_field
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+
+from apps.common.thumbnails import VARIANT_FORMATS, variant_urls, variants_ready_field
+
+# Поля, чей to_representation сводится к приведению типа
+SIMPLE_CONVERTERS = {
+    serializers.CharField.to_representation: str,
+    serializers.IntegerField.to_representation: int,
+    serializers.FloatField.to_representation: float,
+}
+
+
+@extend_schema_field({
+    "type": "object",
+    "nullable": True,
+    "description": "Thumbnail URLs by size and format, null until the variants are built",
+    "properties": {
+        size: {
+            "type": "object",
+            "properties": {file_format: {"type": "string", "format": "uri"} for file_format in VARIANT_FORMATS},
+        }
+        for size in settings.THUMBNAIL_SIZES
+    },
+})
+class ImageVariantsField(serializers.Field):
+    """Read-only {size: {format: url}} of the thumbnail variants of an image field, None when empty or not built yet"""
+
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        # Готовность копий записана в строке модели: хранилище при сериализации не опрашивается
+        if not getattr(value.instance, variants_ready_field(value.field.name), False):
+            return None
+        return variant_urls(value.name)
+
+
+class FastRepresentationMixin:
+    """
+    Быстрый read-path для read-only сериализаторов.
+
+    При первом вызове to_representation поля "компилируются" в список
+    (имя, attrgetter по source, конвертер), который затем переиспользуется
+    для каждой строки списка (ListSerializer держит один экземпляр child).
+    Простые поля приводятся str/int/float напрямую, остальные (Decimal, Image,
+    DateTime, вложенные сериализаторы, SerializerMethodField) используют свой
+    to_representation, поэтому результат совпадает с обычным DRF один в один.
+    Нестандартные случаи (исключение при чтении атрибута, callable-атрибут)
+    уходят в штатный field.get_attribute.
+    """
+
+    def _compile_representation(self):
+        plan = []
+        for field in self._readable_fields:
+            getter = attrgetter(".".join(field.source_attrs)) if field.source_attrs else None
+            convert = SIMPLE_CONVERTERS.get(type(field).to_representation, field.to_representation)
+            plan.append((field.field_name, getter, convert, field))
+        self._representation_plan = plan
+        return plan
+
+    def to_representation(self, instance):
+        plan = getattr(self, "_representation_plan", None) or self._compile_representation()
+        ret = {}
+        for field_name, getter, convert, field in plan:
+            try:
+                attribute = instance if getter is None else getter(instance)
+                if getter is not None and callable(attribute):
+                    raise AttributeError
+            except Exception:
+                try:
+                    attribute = field.get_attribute(instance)
+                except SkipField:
+                    continue
+            ret[field_name] = None if attribute is None else convert(attribute)
+        return ret
@@ -1,3 +1,142 @@
-from django.test import TestCase
+import json
+from base64 import b64encode
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.common.checks import check_versions_cache
+from apps.common.middleware import QueryCountMiddleware, RepeatedQueriesError, fingerprint
+from apps.common.versions import get_versions
+from apps.shop.models import Category, Product
+
+
+def run_queries(count):
+    def view(request):
+        for index in range(count):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT %s", [index])
+        return HttpResponse("ok")
+    return view
+
+
+class QueryCountMiddlewareTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def test_fingerprint_collapses_parameters(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) LIMIT 21'),
+            fingerprint('SELECT * FROM "t"  WHERE "id" IN (%s) LIMIT 5'),
+        )
+
+    def test_headers(self):
+        response = QueryCountMiddleware(run_queries(3))(self.factory.get("/shop/products/"))
+        self.assertEqual(response["X-DB-Query-Count"], "3")
+        self.assertIn("X-DB-Time-Ms", response)
+        self.assertTrue(response["Server-Timing"].startswith("db;dur="))
+
+    def test_other_paths_are_not_instrumented(self):
+        response = QueryCountMiddleware(run_queries(3))(self.factory.get("/admin/"))
+        self.assertNotIn("X-DB-Query-Count", response)
+
+    @override_settings(QUERY_COUNT_STRICT=True, QUERY_COUNT_REPEAT_LIMIT=5)
+    def test_repeated_query_fails_in_strict_mode(self):
+        middleware = QueryCountMiddleware(run_queries(6))
+        with self.assertLogs("apps.queries", level="WARNING"), self.assertRaises(RepeatedQueriesError):
+            middleware(self.factory.get("/shop/products/"))
+
+    @override_settings(QUERY_COUNT_STRICT=False, QUERY_COUNT_REPEAT_LIMIT=5)
+    def test_repeated_query_is_logged_outside_strict_mode(self):
+        with self.assertLogs("apps.queries", level="WARNING") as logs:
+            response = QueryCountMiddleware(run_queries(6))(self.factory.get("/shop/products/"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('"repeated"', logs.output[0])
+
+    @override_settings(QUERY_COUNT_STRICT=True)
+    def test_product_list_query_count_does_not_grow(self):
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        client = APIClient()
+        counts = []
+        for total in (2, 12):
+            while Product.objects.count() < total:
+                Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=category)
+            counts.append(client.get("/shop/products/?page_size=20")["X-DB-Query-Count"])
+        self.assertEqual(counts[0], counts[1])
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class CompositeCursorPaginationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        # Много одинаковых цен: позиция только по price_current потребовала бы OFFSET
+        for index in range(11):
+            Product.objects.create(name="Phone", desc="desc", price_current="10.00" if index < 8 else "5.00", category=category)
+        self.client = APIClient()
+
+    def walk(self, url):
+        pages = []
+        with CaptureQueriesContext(connection) as queries:
+            while url:
+                data = self.client.get(url).json()
+                pages.append(data)
+                url = data["next"]
+        self.assertFalse([query["sql"] for query in queries if "OFFSET" in query["sql"]])
+        return pages
+
+    def test_walk_with_price_ties(self):
+        pages = self.walk("/shop/products/?cursor=&ordering=-price_current&page_size=3")
+        slugs = [product["slug"] for page in pages for product in page["results"]]
+        expected = list(Product.objects.order_by("-price_current", "-id").values_list("slug", flat=True))
+        self.assertEqual(slugs, expected)
+
+        # Обратный обход по previous возвращает те же страницы
+        previous = pages[-1]["previous"]
+        for page in reversed(pages[:-1]):
+            data = self.client.get(previous).json()
+            self.assertEqual(data["results"], page["results"])
+            previous = data["previous"]
+        self.assertIsNone(previous)
+
+    def test_crafted_cursors_are_rejected(self):
+        def cursor(**tokens):
+            return b64encode(urlencode(tokens).encode()).decode()
+
+        position = json.dumps([str(Product.objects.first().created_at), "x"])
+        for tokens in ({"p": '["not-a-date", "x"]'}, {"p": position}, {"p": "[1]"}, {"o": 5}):
+            with self.subTest(tokens):
+                response = self.client.get("/shop/products/", {"cursor": cursor(**tokens)})
+                self.assertEqual(response.status_code, 404)
+
+
+class GetVersionsTests(SimpleTestCase):
+    def test_concurrently_created_counter_is_read_back(self):
+        cache = caches[settings.VERSIONS_CACHE_ALIAS]
+        cache.delete_many(["version:race", "modified:race"])
+        # Другой процесс создал счётчик между get_many и add
+        def get_many(keys):
+            cache.set_many({"version:race": 5, "modified:race": 100.0}, timeout=None)
+            return {}
+
+        with mock.patch.object(cache, "get_many", side_effect=get_many):
+            self.assertEqual(get_versions(["race"]), [(5, 100.0)])
+        cache.delete_many(["version:race", "modified:race"])
+
+
+class VersionsCacheCheckTests(SimpleTestCase):
+    LOCMEM = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+    SHARED = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379"}
+
+    def test_per_process_cache_is_rejected(self):
+        with override_settings(CACHES={"default": self.LOCMEM}, VERSIONS_CACHE_ALIAS="default"):
+            self.assertEqual([error.id for error in check_versions_cache(None)], ["common.E001"])
+
+    def test_shared_cache_passes(self):
+        with override_settings(CACHES={"default": self.LOCMEM, "versions": self.SHARED}, VERSIONS_CACHE_ALIAS="versions"):
+            self.assertEqual(check_versions_cache(None), [])
@@ -0,0 +1,196 @@
+import logging
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from apps.common.versions import bump_versions
+
+logger = logging.getLogger("apps.thumbnails")
+
+# Формат файла -> (имя формата Pillow, расширение)
+VARIANT_FORMATS = {"webp": ("WEBP", "webp"), "jpeg": ("JPEG", "jpg")}
+# Все копии лежат под отдельным префиксом: загрузки (upload_to) туда не попадают,
+# поэтому конвейер перезаписывает и удаляет только созданные им файлы
+VARIANT_PREFIX = "thumbs/"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def variant_name(name, size, file_format):
+    """product_images/phone.png -> thumbs/product_images/phone.png.small.webp (the full original name is kept)"""
+    return posixpath.join(VARIANT_PREFIX, f"{name}.{size}.{VARIANT_FORMATS[file_format][1]}")
+
+
+def last_variant_name(name):
+    """The variant generate_variants writes last: once it exists, all of them do"""
+    return variant_name(name, list(settings.THUMBNAIL_SIZES)[-1], list(VARIANT_FORMATS)[-1])
+
+
+def variant_urls(name):
+    """{size: {format: url}} of an image, None when it is empty; does not check that the variants exist"""
+    if not name:
+        return None
+    return {
+        size: {file_format: default_storage.url(variant_name(name, size, file_format)) for file_format in VARIANT_FORMATS}
+        for size in settings.THUMBNAIL_SIZES
+    }
+
+
+def generate_variants(name, storage=default_storage):
+    """
+    Writes every size x format variant of one stored image, replacing old ones.
+    Returns the number of written files (0 if the original is missing or not an image).
+    """
+    try:
+        with storage.open(name, "rb") as file:
+            original = ImageOps.exif_transpose(Image.open(file))
+            original.load()
+    except (FileNotFoundError, UnidentifiedImageError, OSError) as error:
+        logger.warning("Thumbnail source %s skipped: %s", name, error)
+        return 0
+
+    written = 0
+    for size, box in settings.THUMBNAIL_SIZES.items():
+        image = original.copy()
+        image.thumbnail(box, Image.LANCZOS)
+        for file_format, (pillow_format, _) in VARIANT_FORMATS.items():
+            # JPEG без альфа-канала, WebP сохраняет прозрачность
+            converted = image.convert("RGB" if file_format == "jpeg" or image.mode not in ("RGB", "RGBA") else image.mode)
+            buffer = BytesIO()
+            converted.save(buffer, pillow_format, quality=settings.THUMBNAIL_QUALITY)
+            target = variant_name(name, size, file_format)
+            # storage.save не перезаписывает, а добавляет суффикс к имени;
+            # target всегда под VARIANT_PREFIX, чужие файлы не удаляются
+            storage.delete(target)
+            storage.save(target, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbnails")
+        return _executor
+
+
+def build_variants(name):
+    """
+    generate_variants that never raises: a failure (a decompression bomb, a
+    suspicious path) is logged and counted as 0 written files, so one bad
+    image does not stop a batch.
+    """
+    try:
+        return generate_variants(name)
+    except Exception:
+        logger.exception("Thumbnail generation failed for %s", name)
+        return 0
+
+
+def variants_ready_field(field):
+    """Boolean column that records that the variants of an image field are built"""
+    return f"{field}_variants_ready"
+
+
+def mark_variants_ready(model, field, names):
+    """Sets <field>_variants_ready on the rows whose field still holds one of names"""
+    model._base_manager.filter(**{f"{field}__in": names}).update(**{variants_ready_field(field): True})
+
+
+def _run(task, scopes):
+    model, field, name = task
+    if build_variants(name):
+        # Копии общие для всех строк с этим файлом; заменённая картинка флаг не получит
+        mark_variants_ready(model, field, [name])
+        # Ответы с null вместо копий закэшированы по версиям: сдвигаем их
+        if scopes:
+            bump_versions(*scopes)
+
+
+def _run_in_pool(task, scopes):
+    try:
+        _run(task, scopes)
+    finally:
+        # Поток пула живёт долго: соединение с БД закрывается, как после запроса
+        close_old_connections()
+
+
+def schedule_variants(tasks, scopes=()):
+    """
+    Generates the variants of the given (model, field, name) images in the
+    worker pool after the current transaction commits, off the request thread,
+    marks them ready and bumps the version scopes whose responses show them.
+    With THUMBNAIL_EAGER they are generated inline.
+    """
+    tasks = [task for task in set(tasks) if task[2]]
+    if not tasks:
+        return
+
+    def submit():
+        for task in tasks:
+            if settings.THUMBNAIL_EAGER:
+                _run(task, scopes)
+            else:
+                _get_executor().submit(_run_in_pool, task, scopes)
+
+    transaction.on_commit(submit)
+
+
+class ImageVariantsMixin:
+    """
+    Model mixin: after save, schedules thumbnail variants for the image
+    fields in variant_fields whose file changed since loading.
+
+    Every such field has a BooleanField <field>_variants_ready, reset when
+    the file changes and set once its variants are written; serializers read
+    it instead of asking the storage.
+    """
+
+    variant_fields = ()
+
+    def variant_scopes(self):
+        """Version scopes of the cached responses that show the variants of this instance"""
+        return []
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Имена файлов на момент загрузки: варианты строятся только для новых
+        instance._stored_images = instance._image_names()
+        return instance
+
+    def _image_names(self):
+        return {field: str(self.__dict__.get(field) or "") for field in self.variant_fields}
+
+    def save(self, *args, **kwargs):
+        stored = getattr(self, "_stored_images", {})
+        names = self._image_names()
+        changed = [field for field, name in names.items() if name != stored.get(field)]
+        for field in changed:
+            # Общая картинка по умолчанию обрабатывается один раз командой build_thumbnails:
+            # её копии проверяются при записи, а не при каждой сериализации
+            is_default = names[field] == self._meta.get_field(field).default
+            ready = is_default and default_storage.exists(last_variant_name(names[field]))
+            setattr(self, variants_ready_field(field), ready)
+        if changed and kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], *map(variants_ready_field, changed)}
+        super().save(*args, **kwargs)
+        # Имена после сохранения: загруженный файл получает путь в хранилище
+        current = self._image_names()
+        schedule_variants(
+            [
+                (type(self), field, current[field]) for field in changed
+                if current[field] != self._meta.get_field(field).default
+            ],
+            self.variant_scopes(),
+        )
+        self._stored_images = current
@@ -1,28 +1,181 @@
+import os
 import secrets
+import threading
+import time
+import uuid
 
-from apps.common.models import BaseModel
+# Символы упорядочены по ASCII, поэтому коды сортируются так же, как время их создания
+ALLOWED_CHARS = "123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+CODE_EPOCH_MS = 1704067200000  # 2024-01-01 UTC
 
 
-def generate_unique_code(model: BaseModel, field: str) -> str:
+class UniqueCodeGenerator:
     """
-    Generate a unique code for a specified model and field.
+    Generates time-ordered codes that are unique without a database pre-check.
+
+    A code is one integer written in base 35 with a fixed width:
+        milliseconds since CODE_EPOCH_MS | per-process counter | random node id.
+    The counter makes codes unique inside a process (it never repeats within a
+    millisecond), the node id (re-drawn after fork) separates processes. A clash
+    between two processes needs the same millisecond, counter and node id and is
+    left to the unique constraint (see Order.save).
+
+    Attributes:
+        length (int): The code length; 14 chars hold 42 bits of time,
+            12 bits of counter and 17 bits of node id.
+    """
+
+    time_bits = 42
+    counter_bits = 12
+
+    def __init__(self, length=14):
+        self.length = length
+        capacity_bits = (len(ALLOWED_CHARS) ** length).bit_length() - 1
+        self.node_bits = capacity_bits - self.time_bits - self.counter_bits
+        if self.node_bits < 0:
+            raise ValueError(f"Code length {length} is too short")
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._node = secrets.randbits(self.node_bits) if self.node_bits else 0
+        self._last_ms = 0
+        self._counter = 0
+
+    def _next_value(self):
+        # Вызывается под self._lock
+        now_ms = int(time.time() * 1000) - CODE_EPOCH_MS
+        if now_ms > self._last_ms:
+            self._last_ms = now_ms
+            self._counter = 0
+        else:
+            # Та же миллисекунда (или часы ушли назад): продолжаем счётчик,
+            # при переполнении занимаем следующую миллисекунду
+            self._counter += 1
+            if self._counter >> self.counter_bits:
+                self._last_ms += 1
+                self._counter = 0
+        return ((self._last_ms << self.counter_bits | self._counter) << self.node_bits) | self._node
+
+    def _encode(self, value):
+        base = len(ALLOWED_CHARS)
+        chars = []
+        for _ in range(self.length):
+            value, remainder = divmod(value, base)
+            chars.append(ALLOWED_CHARS[remainder])
+        return "".join(reversed(chars))
+
+    def generate(self):
+        with self._lock:
+            value = self._next_value()
+        return self._encode(value)
+
+    def generate_many(self, count):
+        with self._lock:
+            values = [self._next_value() for _ in range(count)]
+        return [self._encode(value) for value in values]
+
+
+unique_code_generator = UniqueCodeGenerator()
 
-    Args:
-        model (BaseModel): The model class to check for uniqueness.
-        field (str): The field name to check for uniqueness.
+
+def generate_unique_code() -> str:
+    """
+    Generate a unique, time-ordered code without querying the database.
 
     Returns:
         str: A unique code.
     """
-    allowed_chars = "ABCDEFGHIJKLMNOPQRSTUVWXYZ123456789"
-    unique_code = "".join(secrets.choice(allowed_chars) for _ in range(12))
-    similar_object_exists = model.objects.filter(**{field: unique_code}).exists()
-    if not similar_object_exists:
-        return unique_code
-    return generate_unique_code(model, field)
+    return unique_code_generator.generate()
+
+
+def generate_unique_codes(count: int) -> list[str]:
+    """
+    Generate several unique codes at once, e.g. for batch order imports.
+
+    Args:
+        count (int): The number of codes to generate.
+
+    Returns:
+        list[str]: Unique codes in ascending order.
+    """
+    return unique_code_generator.generate_many(count)
+
+
+class UUID7Generator:
+    """
+    Generates time-ordered UUIDs (version 7, RFC 9562) for primary keys.
+
+    Layout: 48 bits of Unix milliseconds | version | 12-bit counter | variant | 62 random bits.
+    New keys land at the right edge of the B-tree index and sort by creation
+    time, so ordering by -id means newest first. The counter starts at a random
+    value every millisecond and keeps keys of one process strictly increasing.
+    """
+
+    counter_bits = 12
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def _reset(self):
+        self._last_ms = 0
+        self._counter = 0
+
+    @staticmethod
+    def build(unix_ms, counter, random_bits):
+        value = (unix_ms & (1 << 48) - 1) << 80
+        value |= 0x7 << 76 | counter << 64
+        value |= 0b10 << 62 | random_bits
+        return uuid.UUID(int=value)
+
+    def generate(self):
+        with self._lock:
+            now_ms = int(time.time() * 1000)
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                # Старший бит счётчика свободен: запас на переполнение в той же миллисекунде
+                self._counter = secrets.randbits(self.counter_bits - 1)
+            else:
+                self._counter += 1
+                if self._counter >> self.counter_bits:
+                    self._last_ms += 1
+                    self._counter = 0
+            unix_ms, counter = self._last_ms, self._counter
+        return self.build(unix_ms, counter, secrets.randbits(62))
+
+
+uuid7_generator = UUID7Generator()
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Default for UUID primary keys: a time-ordered, monotonic UUID v7.
+
+    Returns:
+        uuid.UUID: A new UUID.
+    """
+    return uuid7_generator.generate()
+
+
+def uuid7_from_datetime(value) -> uuid.UUID:
+    """
+    Build a UUID v7 for an existing row from its creation time (used to re-key old uuid4 rows).
+
+    Args:
+        value (datetime): An aware creation timestamp.
+
+    Returns:
+        uuid.UUID: A UUID that sorts by the given time.
+    """
+    return UUID7Generator.build(int(value.timestamp() * 1000), secrets.randbits(12), secrets.randbits(62))
 
 
 def set_dict_attr(obj, data):
     for attr, value in data.items():
         setattr(obj, attr, value) # Или obj.attr = value для каждого атрибута
-    return obj
\ No newline at end of file
+    return obj
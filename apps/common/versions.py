@@ -0,0 +1,160 @@
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date, urlencode
+from rest_framework.response import Response
+
+from apps.common.paginations import CustomCursorPagination
+
+VERSION_KEY = "version:{}"
+MODIFIED_KEY = "modified:{}"
+# Параметры, значимые самим присутствием: пустой ?cursor= включает курсорную пагинацию
+PRESENCE_PARAMS = (CustomCursorPagination.cursor_query_param,)
+
+
+def _cache():
+    return caches[settings.VERSIONS_CACHE_ALIAS]
+
+
+def bump_versions(*names):
+    """
+    Bumps the write counters of the given names (tables or narrower scopes)
+    and stamps their modification time. Called from the model write paths.
+    """
+    cache = _cache()
+    now = time.time()
+    for name in names:
+        try:
+            cache.incr(VERSION_KEY.format(name))
+        except ValueError:
+            # Ключ вытеснен: начинаем с отметки времени, чтобы не совпасть со старыми версиями
+            cache.add(VERSION_KEY.format(name), int(now * 1000), timeout=None)
+    cache.set_many({MODIFIED_KEY.format(name): now for name in names}, timeout=None)
+
+
+def get_versions(names):
+    """
+    [(version, modified_at)] for the names with a single cache round trip.
+    Missing counters are created, their modification time is taken as now;
+    a counter created concurrently by another process is read back.
+    """
+    cache = _cache()
+    keys = [key.format(name) for name in names for key in (VERSION_KEY, MODIFIED_KEY)]
+    values = cache.get_many(keys)
+    now = time.time()
+    for key in keys:
+        if key not in values:
+            value = int(now * 1000) if key.startswith("version:") else now
+            # add: параллельный процесс мог уже создать ключ - тогда берём его значение,
+            # иначе процессы строили бы ETag и ключи кэша от разных счётчиков
+            if not cache.add(key, value, timeout=None):
+                stored = cache.get(key)
+                value = value if stored is None else stored
+            values[key] = value
+    return [(values[VERSION_KEY.format(name)], values[MODIFIED_KEY.format(name)]) for name in names]
+
+
+def resolve_scopes(names, view, request, kwargs):
+    # Элемент names - строка или callable (view, request, kwargs) -> строка
+    return [name(view, request, kwargs) if callable(name) else name for name in names]
+
+
+def normalized_query(request):
+    """
+    Query string with sorted keys and blank values dropped: equal requests map to one key.
+    Blank PRESENCE_PARAMS are kept, ?cursor= and no cursor get different paginators.
+    """
+    return urlencode(sorted(
+        (key, value) for key, values in request.GET.lists() for value in values if value or key in PRESENCE_PARAMS
+    ))
+
+
+def is_first_pages(request):
+    """Page number up to RESPONSE_CACHE_MAX_PAGE or the first cursor page"""
+    if request.GET.get("cursor"):
+        return False
+    page = request.GET.get("page", "1")
+    return page.isdigit() and int(page) <= settings.RESPONSE_CACHE_MAX_PAGE
+
+
+def conditional_on_versions(*names):
+    """
+    Conditional GET for an APIView handler whose response depends only on
+    the URL and the version counters of names.
+
+    ETag is derived from the full path and the versions, Last-Modified from
+    the latest modification time. A request whose If-None-Match /
+    If-Modified-Since still match gets 304 before the handler runs, so
+    neither the query nor the serializer is executed. The validators are
+    attached to 200 responses only.
+
+    An entry of names may be a callable (view, request, kwargs) -> name for
+    per-object scopes.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            scopes = resolve_scopes(names, view, request, kwargs)
+            versions = get_versions(scopes)
+            state = "|".join([request.get_full_path(), *(f"{scope}={version}" for scope, (version, _) in zip(scopes, versions))])
+            etag = quote_etag(hashlib.md5(state.encode()).hexdigest())
+            last_modified = int(max(modified for _, modified in versions))
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                not_modified["ETag"] = etag
+                not_modified["Last-Modified"] = http_date(last_modified)
+                return not_modified
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                response["ETag"] = etag
+                response["Last-Modified"] = http_date(last_modified)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def cached_on_versions(*names):
+    """
+    Response cache for an APIView GET handler whose data depends only on the
+    URL and the version counters of names (see conditional_on_versions).
+
+    The key holds the view, host, path, normalized query string and the
+    current versions, so a bump of any scope makes the old entries
+    unreachable and they expire by RESPONSE_CACHE_TIMEOUT. Only 200
+    responses of the first pages (is_first_pages) are stored.
+    """
+
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if not is_first_pages(request):
+                return handler(view, request, *args, **kwargs)
+            scopes = resolve_scopes(names, view, request, kwargs)
+            versions = get_versions(scopes)
+            state = "|".join([
+                request.get_host(), request.path, normalized_query(request),
+                *(f"{scope}={version}" for scope, (version, _) in zip(scopes, versions)),
+            ])
+            key = f"response:{type(view).__name__}:{hashlib.md5(state.encode()).hexdigest()}"
+            cache = caches[settings.RESPONSE_CACHE_ALIAS]
+            data = cache.get(key)
+            if data is not None:
+                return Response(data=data, status=200)
+
+            response = handler(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+            return response
+
+        return wrapper
+
+    return decorator
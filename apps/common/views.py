@@ -1,3 +1,25 @@
-from django.shortcuts import render
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from apps.common.paginations import CursorPaginationMixin
+
+
+class PaginatedListView(CursorPaginationMixin, APIView):
+    """
+    Общая база для списочных эндпоинтов: фильтрация filterset_class,
+    постраничная или курсорная (?cursor=) пагинация с ограничением max_page_size.
+    Список никогда не сериализуется целиком.
+    """
+    serializer_class = None
+    filterset_class = None
+
+    def paginated_response(self, request, queryset):
+        if self.filterset_class is not None:
+            filterset = self.filterset_class(request.GET, queryset=queryset)
+            if not filterset.is_valid():
+                return Response(filterset.errors, status=400)
+            queryset = filterset.qs
+        paginator = self.get_paginator(request)
+        paginated_queryset = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.serializer_class(paginated_queryset, many=True)
+        return paginator.get_paginated_response(serializer.data)
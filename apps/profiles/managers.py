@@ -0,0 +1,64 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.common.managers import GetOrNoneManager, GetOrNoneQuerySet, IsDeletedManager, IsDeletedQuerySet
+
+
+class OrderQuerySet(GetOrNoneQuerySet):
+    def with_totals(self):
+        """
+        Сумма заказа в SQL: сохранённая при оформлении, а для старых заказов -
+        подзапросом по позициям, вместо обхода orderitems в Python
+        """
+        from apps.profiles.models import OrderItem
+
+        subtotal = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(subtotal=Sum(Coalesce("unit_price", "product__price_current") * F("quantity")))
+            .values("subtotal")
+        )
+        return self.annotate(
+            annotated_subtotal=Coalesce(
+                "subtotal",
+                Subquery(subtotal, output_field=DecimalField(max_digits=100, decimal_places=2)),
+                Value(Decimal("0")),
+                output_field=DecimalField(max_digits=100, decimal_places=2),
+            )
+        )
+
+
+class OrderManager(GetOrNoneManager):
+    def get_queryset(self):
+        return OrderQuerySet(self.model)
+
+    def with_totals(self):
+        return self.get_queryset().with_totals()
+
+
+class ProductReviewQuerySet(IsDeletedQuerySet):
+    def delete(self, hard_delete=False):
+        """
+        Массовое удаление (мягкое или полное) с переносом оценок видимых отзывов
+        из счётчиков рейтинга товаров, как ProductReview.save/hard_delete
+        """
+        from apps.shop.models import Product
+
+        with transaction.atomic():
+            removed = defaultdict(dict)
+            visible = self.filter(is_deleted=False).order_by().values("product_id", "rating").annotate(count=Count("id"))
+            for row in visible:
+                removed[row["product_id"]][row["rating"]] = row["count"]
+            result = super().delete(hard_delete=hard_delete)
+            for product_id, ratings in removed.items():
+                Product.remove_rating_stats(product_id, ratings)
+        return result
+
+
+class ProductReviewManager(IsDeletedManager):
+    queryset_class = ProductReviewQuerySet
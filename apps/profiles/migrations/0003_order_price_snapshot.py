@@ -0,0 +1,51 @@
+# Generated by Django 6.0 on 2026-10-18 05:44
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum
+
+
+def freeze_existing_orders(apps, schema_editor):
+    # Для уже оформленных заказов фиксируем текущие цены товаров
+    Order = apps.get_model('profiles', 'Order')
+    OrderItem = apps.get_model('profiles', 'OrderItem')
+    Product = apps.get_model('shop', 'Product')
+    OrderItem.objects.filter(order__isnull=False).update(
+        unit_price=Subquery(Product.objects.filter(pk=OuterRef('product_id')).values('price_current')[:1])
+    )
+    subtotal = (
+        OrderItem.objects.filter(order=OuterRef('pk'))
+        .order_by()
+        .values('order')
+        .annotate(subtotal=Sum(F('unit_price') * F('quantity')))
+        .values('subtotal')
+    )
+    Order.objects.update(subtotal=Subquery(subtotal))
+    Order.objects.filter(subtotal__isnull=True).update(subtotal=0)
+    Order.objects.update(total=F('subtotal'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_productreview'),
+        ('shop', '0003_product_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='subtotal',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='unit_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(freeze_existing_orders, migrations.RunPython.noop),
+    ]
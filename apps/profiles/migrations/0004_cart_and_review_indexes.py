@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 05:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0003_order_price_snapshot'),
+        ('shop', '0006_product_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(condition=models.Q(('order__isnull', True)), fields=['user', 'created_at'], name='profiles_cart_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productreview',
+            index=models.Index(condition=models.Q(('is_deleted', False)), fields=['product', 'id'], name='profiles_review_product_idx'),
+        ),
+    ]
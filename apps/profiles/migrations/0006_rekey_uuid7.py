@@ -0,0 +1,67 @@
+# Generated by Django 6.0 on 2026-10-18 06:10
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+from apps.common.utils import uuid7_from_datetime
+
+# Модели на BaseModel; ключи переписываются из created_at,
+# поэтому -id у старых строк тоже означает "сначала новые".
+# accounts.User не переключается: user_id в уже выданных access/refresh токенах
+# указывал бы на несуществующий ключ и все пользователи были бы разлогинены.
+# Старые пользователи остаются на uuid4, новые получают uuid7.
+REKEY_MODELS = [
+    "sellers.Seller",
+    "shop.Category",
+    "shop.Product",
+    "profiles.ShippingAddress",
+    "profiles.Order",
+    "profiles.OrderItem",
+    "profiles.ProductReview",
+]
+# Строк на один UPDATE ... CASE: 3 параметра на строку укладываются в лимит SQLite
+BATCH_SIZE = 300
+
+
+def remap(queryset, field_name, mapping):
+    """One UPDATE setting field_name to mapping[old value] for the rows holding the old values"""
+    whens = [When(**{field_name: old}, then=Value(new)) for old, new in mapping.items()]
+    queryset.filter(**{f"{field_name}__in": list(mapping)}).update(
+        **{field_name: Case(*whens, output_field=models.UUIDField())}
+    )
+
+
+def rekey_to_uuid7(apps, schema_editor):
+    for label in REKEY_MODELS:
+        model = apps.get_model(label)
+        # Внешние ключи на модель из других таблиц
+        references = [
+            (relation.related_model, relation.field.name)
+            for relation in model._meta.related_objects
+            if relation.field.concrete and not relation.many_to_many
+        ]
+        rows = model._base_manager.order_by("created_at").values_list("pk", "created_at")
+        # Новые uuid7 не пересекаются со старыми uuid4, поэтому пачку можно переписать одним UPDATE
+        mapping = {old_pk: uuid7_from_datetime(created_at) for old_pk, created_at in rows.iterator() if old_pk.version != 7}
+        old_pks = list(mapping)
+        for start in range(0, len(old_pks), BATCH_SIZE):
+            batch = {old_pk: mapping[old_pk] for old_pk in old_pks[start:start + BATCH_SIZE]}
+            remap(model._base_manager.all(), "id", batch)
+            for related_model, field_name in references:
+                remap(related_model._base_manager.all(), field_name, batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_uuid7_primary_keys'),
+        ('admin', '0003_logentry_add_action_flag_choices'),
+        ('profiles', '0005_uuid7_primary_keys'),
+        ('sellers', '0002_uuid7_primary_keys'),
+        ('shop', '0007_uuid7_primary_keys'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(rekey_to_uuid7, migrations.RunPython.noop),
+    ]
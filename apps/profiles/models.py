@@ -1,8 +1,12 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, OuterRef, Q, Subquery, Sum
 
 from apps.accounts.models import User
 from apps.common.models import BaseModel, IsDeletedModel
 from apps.common.utils import generate_unique_code
+from apps.profiles.managers import OrderManager, ProductReviewManager
 from apps.shop.models import Product
 
 
@@ -57,6 +61,9 @@ PAYMENT_STATUS_CHOICES = (
 )
 
 
+TX_REF_SAVE_ATTEMPTS = 3
+
+
 class Order(BaseModel):
     """
     Represents a customer's order.
@@ -66,12 +73,15 @@ class Order(BaseModel):
         tx_ref (str): The unique transaction reference.
         delivery_status (str): The delivery status of the order.
         payment_status (str): The payment status of the order.
+        subtotal (Decimal): The sum of frozen line totals, stored at checkout.
+        total (Decimal): The amount to be paid, stored at checkout.
 
     Methods:
         __str__():
             Returns a string representation of the transaction reference.
         save(*args, **kwargs):
-            Overrides the save method to generate a unique transaction reference when a new order is created.
+            Overrides the save method to generate a unique transaction reference when a new order is created
+            (unless one is already set), retrying with a fresh code on a unique-constraint clash.
     """
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="orders")
@@ -94,26 +104,61 @@ class Order(BaseModel):
     country = models.CharField(max_length=100, null=True)
     zipcode = models.CharField(max_length=6, null=True)
 
+    # Totals frozen at checkout (None for orders created before snapshotting)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    total = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    objects = OrderManager()
+
     def __str__(self):
         return f"{self.user.full_name}'s order"
 
     def save(self, *args, **kwargs) -> None:
-        if not self.created_at:
-            self.tx_ref = generate_unique_code(Order, "tx_ref")
-        super().save(*args, **kwargs)
+        if self.created_at or self.tx_ref:
+            super().save(*args, **kwargs)
+            return
+        # Код уникален по построению; на редкое совпадение между процессами
+        # отвечает unique-ограничение, тогда просто берём новый код
+        for attempt in range(TX_REF_SAVE_ATTEMPTS):
+            self.tx_ref = generate_unique_code()
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                if attempt == TX_REF_SAVE_ATTEMPTS - 1 or not Order.objects.filter(tx_ref=self.tx_ref).exists():
+                    raise
 
 
     @property
     def get_cart_subtotal(self):
+        if self.subtotal is not None:
+            return self.subtotal
+        # Сумма, посчитанная в SQL через Order.objects.with_totals()
+        if hasattr(self, "annotated_subtotal"):
+            return self.annotated_subtotal
         orderitems = self.orderitems.all()
         total = sum([item.get_total for item in orderitems])
         return total
 
     @property
     def get_cart_total(self):
+        if self.total is not None:
+            return self.total
         total = self.get_cart_subtotal
         return total
 
+    def freeze_totals(self):
+        """Фиксирует цены позиций и суммы заказа (вызывается при оформлении заказа)"""
+        self.orderitems.filter(unit_price__isnull=True).update(
+            unit_price=Subquery(
+                Product.objects.filter(pk=OuterRef("product_id")).values("price_current")[:1]
+            )
+        )
+        subtotal = self.orderitems.aggregate(subtotal=Sum(F("unit_price") * F("quantity")))["subtotal"]
+        self.subtotal = self.total = subtotal or Decimal("0")
+        self.save(update_fields=["subtotal", "total", "updated_at"])
+
 
 class OrderItem(BaseModel):
     """
@@ -123,8 +168,7 @@ class OrderItem(BaseModel):
         order (ForeignKey): The order to which this item belongs.
         product (ForeignKey): The product associated with this order item.
         quantity (int): The quantity of the product ordered.
-
-
+        unit_price (Decimal): The product price frozen at checkout, None while the item is in a cart.
     """
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
@@ -137,18 +181,37 @@ class OrderItem(BaseModel):
     )
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
 
     @property
     def get_total(self):
+        if self.unit_price is not None:
+            return self.unit_price * self.quantity
         return self.product.price_current * self.quantity
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Корзина: позиции пользователя без заказа
+            models.Index(fields=["user", "created_at"], condition=Q(order__isnull=True), name="profiles_cart_user_idx"),
+        ]
 
     def __str__(self):
         return self.product.name
 
 
+class DirtyCart(BaseModel):
+    """
+    Durable queue entry of a cache-backed cart (apps.shop.carts.CacheCart)
+    whose changes are not written to OrderItem yet; consumed by flush_carts.
+
+    Attributes:
+        user (OneToOneField): The owner of the cart.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="+")
+
+
 from enum import Enum
 RATING_CHOICES = ((1, 1), (2, 2), (3, 3), (4, 4), (5, 5))
 
@@ -162,4 +225,49 @@ class ProductReview(IsDeletedModel):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='review')
     rating = models.IntegerField(choices=RATING_CHOICES)
-    text = models.TextField(blank=True)
\ No newline at end of file
+    text = models.TextField(blank=True)
+
+    objects = ProductReviewManager()
+
+    class Meta(IsDeletedModel.Meta):
+        indexes = [
+            # Видимые отзывы товара в порядке по умолчанию (-id)
+            models.Index(fields=["product", "id"], condition=Q(is_deleted=False), name="profiles_review_product_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем вклад отзыва в рейтинг товара на момент загрузки
+        instance._stored_rating = instance._rating_contribution()
+        return instance
+
+    def _rating_contribution(self):
+        """(product_id, rating) для видимого отзыва, None для скрытого"""
+        if self.is_deleted:
+            return None
+        return self.product_id, self.rating
+
+    def _sync_product_rating(self, old, new):
+        if old and new and old[0] == new[0]:
+            Product.update_rating_stats(new[0], remove=old[1], add=new[1])
+            return
+        if old:
+            Product.update_rating_stats(old[0], remove=old[1])
+        if new:
+            Product.update_rating_stats(new[0], add=new[1])
+
+    def save(self, *args, **kwargs):
+        old = getattr(self, "_stored_rating", None)
+        new = self._rating_contribution()
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            self._sync_product_rating(old, new)
+        self._stored_rating = new
+
+    def hard_delete(self, *args, **kwargs):
+        old = getattr(self, "_stored_rating", None)
+        with transaction.atomic():
+            super().hard_delete(*args, **kwargs)
+            self._sync_product_rating(old, None)
+        self._stored_rating = None
\ No newline at end of file
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from apps.common.serializers import FastRepresentationMixin
 from apps.profiles.models import RATING_CHOICES
 from apps.shop.serializers import ProductSerializer
 
@@ -12,7 +13,7 @@ class ProfileSerializer(serializers.Serializer):
     account_type = serializers.CharField(read_only=True)
 
 
-class ShippingAddressSerializer(serializers.Serializer):
+class ShippingAddressSerializer(FastRepresentationMixin, serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     full_name = serializers.CharField(max_length=255)
     email = serializers.EmailField()
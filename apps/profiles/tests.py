@@ -1,3 +1,97 @@
+import importlib
+import unittest
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.apps import apps
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.common.utils import UniqueCodeGenerator, UUID7Generator
+from apps.profiles.models import Order, OrderItem, ProductReview
+from apps.shop.models import Category, Product
+from apps.shop.tests import QueryPlanAssertions, create_buyer
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Query plans are checked against SQLite")
+class CartAndReviewIndexTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        self.user, _ = create_buyer(0)
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.product = Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=category)
+
+    def test_cart_lookup(self):
+        self.assertUsesIndex(OrderItem.objects.filter(user=self.user, order=None), "profiles_cart_user_idx")
+
+    def test_product_reviews(self):
+        self.assertUsesIndex(ProductReview.objects.filter(product=self.product), "profiles_review_product_idx")
+
+
+class TxRefTests(TestCase):
+    def test_codes_are_unique_and_time_ordered(self):
+        generator = UniqueCodeGenerator()
+        # Больше 4096 кодов (ёмкость счётчика) за миллисекунду - переполнение в следующую
+        codes = generator.generate_many(10000) + [generator.generate() for _ in range(100)]
+        self.assertEqual(len(set(codes)), len(codes))
+        self.assertEqual(codes, sorted(codes))
+        self.assertEqual({len(code) for code in codes}, {14})
+
+    def test_save_retries_on_clashing_code(self):
+        user, _ = create_buyer(0)
+        taken = Order.objects.create(user=user).tx_ref
+        with mock.patch("apps.profiles.models.generate_unique_code", side_effect=[taken, "FRESHCODE00001"]):
+            order = Order.objects.create(user=user)
+        self.assertEqual(order.tx_ref, "FRESHCODE00001")
+        self.assertEqual(Order.objects.count(), 2)
+
+
+rekey_migration = importlib.import_module("apps.profiles.migrations.0006_rekey_uuid7")
+
+
+class UUID7KeyTests(TestCase):
+    def test_keys_are_monotonic(self):
+        generator = UUID7Generator()
+        keys = [generator.generate() for _ in range(10000)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual({key.version for key in keys}, {7})
+
+    def test_rekey_migration(self):
+        user, _ = create_buyer(0)
+        category = Category.objects.create(id=uuid.uuid4(), name="Phones", image="category_images/phones.jpg")
+        products = [
+            Product.objects.create(
+                id=uuid.uuid4(), name=f"Phone {index}", desc="desc", price_current="1.00", category=category
+            )
+            for index in range(3)
+        ]
+        # Порядок создания не совпадает с порядком случайных uuid4
+        start = products[0].created_at
+        for offset, product in zip((2, 0, 1), products):
+            Product.objects.filter(pk=product.pk).update(created_at=start + timedelta(minutes=offset))
+        OrderItem.objects.create(user=user, product=products[0])
+        old_user = User.objects.create_user("Old", "User", "old@example.com", "pass", id=uuid.uuid4())
+
+        with CaptureQueriesContext(connection) as queries:
+            rekey_migration.rekey_to_uuid7(apps, None)
+        # Одна пачка: один UPDATE на таблицу товаров и по одному на каждую ссылку на неё
+        product_updates = [query for query in queries if query["sql"].startswith('UPDATE "shop_product"')]
+        self.assertEqual(len(product_updates), 2)  # shop_product.id и shop_product.category_id
+        # Ключи пользователей не меняются: они записаны в выданных токенах
+        self.assertTrue(User.objects.filter(pk=old_user.pk).exists())
 
-# Create your tests here.
+        rows = list(Product.objects.order_by("id").values_list("id", "name", "category_id"))
+        self.assertEqual([name for _, name, _ in rows], ["Phone 1", "Phone 2", "Phone 0"])
+        self.assertTrue(all(pk.version == 7 for pk, _, _ in rows))
+        new_category = Category.objects.get()
+        self.assertEqual(new_category.id.version, 7)
+        self.assertEqual({category_id for _, _, category_id in rows}, {new_category.id})
+        item = OrderItem.objects.get()
+        self.assertEqual(item.product_id, rows[2][0])
+        # Ключи v7 не переписываются повторно
+        rekey_migration.rekey_to_uuid7(apps, None)
+        self.assertEqual(list(Product.objects.order_by("id").values_list("id", "name", "category_id")), rows)
@@ -49,7 +49,8 @@ class ProfileView(APIView):
         serializer = self.serializer_class(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = set_dict_attr(user, serializer.validated_data)
-        user.save()
+        # Пользователь может быть восстановлен из снимка кэша: пишем только изменённые поля
+        user.save(update_fields=[*serializer.validated_data, "updated_at"])
         serializer = self.serializer_class(user)
         return Response(data=serializer.data)
 
@@ -63,7 +64,7 @@ class ProfileView(APIView):
     def delete(self, request):
         user = request.user
         user.is_active = False
-        user.save()
+        user.save(update_fields=["is_active", "updated_at"])
         return Response(data={"message": "User Account Deactivated"})
 
 
@@ -172,8 +173,7 @@ class OrdersView(APIView):
     )
     def get(self, request):
         user = request.user
-        orders = (Order.objects.filter(user=user).select_related("user")
-                  .prefetch_related("orderitems", "orderitems__product")
+        orders = (Order.objects.with_totals().filter(user=user).select_related("user")
                   .order_by("-created_at"))
         serializer = self.serializer_class(orders, many=True)
         return Response(data=serializer.data, status=200)
@@ -197,7 +197,7 @@ class OrderItemsView(APIView):
         if not order or order.user != request.user:
             return Response(data={"message": "Order does not exist!"}, status=404)
         order_items = OrderItem.objects.filter(order=order).select_related(
-            "product", "product__seller", "product__seller__user"
+            "product", "product__category", "product__seller", "product__seller__user"
         )
         serializer = self.serializer_class(order_items, many=True)
         return Response(data=serializer.data, status=200)
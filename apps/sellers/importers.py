@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+
+from django.db import IntegrityError, transaction
+
+from apps.common.fields import assign_unique_slugs
+from apps.common.thumbnails import schedule_variants
+from apps.common.versions import bump_versions
+from apps.shop.facets import invalidate_facets
+from apps.shop.models import Category, Product, catalog_scopes
+from apps.shop.serializers import ImportProductSerializer
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+
+class ProductImporter:
+    """
+    Streams a CSV/JSONL catalog row by row into Product rows of one seller.
+
+    Every row is validated with ImportProductSerializer, categories come from
+    an in-memory slug map, slugs are allocated per batch (assign_unique_slugs)
+    and rows are inserted with chunked bulk_create. Only the current batch and
+    the error report (capped at max_reported_errors) are kept in memory.
+
+    Attributes:
+        seller (Seller): The owner of the imported products.
+        batch_size (int): Rows per bulk_create.
+    """
+
+    max_reported_errors = 1000
+
+    def __init__(self, seller, batch_size=500):
+        self.seller = seller
+        self.batch_size = batch_size
+        self.categories = {category.slug: category for category in Category.objects.all()}
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+
+    def iter_rows(self, stream, file_format):
+        """Yields (row_number, row) from a binary stream; row is None for unparsable lines."""
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        if file_format == "csv":
+            for row_number, row in enumerate(csv.DictReader(text), start=1):
+                yield row_number, row
+            return
+        for row_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield row_number, row if isinstance(row, dict) else None
+
+    def add_error(self, row_number, errors):
+        self.failed += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({"row": row_number, "errors": errors})
+
+    def build_product(self, row_number, row):
+        if row is None:
+            self.add_error(row_number, {"non_field_errors": ["Invalid row"]})
+            return None
+        # Пустые ячейки CSV считаем незаполненными полями
+        data = {key: value for key, value in row.items() if key and value not in ("", None)}
+        serializer = ImportProductSerializer(data=data, context={"seller": self.seller})
+        if not serializer.is_valid():
+            self.add_error(row_number, serializer.errors)
+            return None
+        data = dict(serializer.validated_data)
+        category = self.categories.get(data.pop("category_slug"))
+        if category is None:
+            self.add_error(row_number, {"category_slug": ["Category does not exist!"]})
+            return None
+        return Product(seller=self.seller, category=category, **data)
+
+    def insert_rows(self, batch):
+        """Построчная вставка после ошибки пакета: у каждой строки своя причина"""
+        products = []
+        for row_number, product in batch:
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create([product])
+            except IntegrityError as error:
+                self.add_error(row_number, {"non_field_errors": [str(error)]})
+            else:
+                products.append(product)
+        return products
+
+    def flush(self, batch):
+        if not batch:
+            return
+        products = [product for _, product in batch]
+        for attempt in range(2):
+            assign_unique_slugs(products)
+            try:
+                with transaction.atomic():
+                    Product.objects.bulk_create(products)
+                break
+            except IntegrityError:
+                # Повторяем пакет, только если slug успели занять параллельно
+                slugs = [product.slug for product in products]
+                if attempt or not Product._base_manager.filter(slug__in=slugs).exists():
+                    products = self.insert_rows(batch)
+                    break
+        self.created += len(products)
+        batch.clear()
+        if not products:
+            return
+        # bulk_create не вызывает save(), сбрасываем кэш фасетов и версии списков вручную
+        invalidate_facets()
+        bump_versions(*catalog_scopes([product.category_id for product in products], [self.seller.id]))
+        schedule_variants(
+            (Product, field, str(getattr(product, field))) for product in products for field in Product.variant_fields
+        )
+
+    def run(self, stream, file_format):
+        if file_format not in IMPORT_FORMATS:
+            raise ValueError(f"Unsupported format {file_format!r}, expected one of {IMPORT_FORMATS}")
+        batch = []
+        for row_number, row in self.iter_rows(stream, file_format):
+            product = self.build_product(row_number, row)
+            if product is not None:
+                batch.append((row_number, product))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+        self.flush(batch)
+        return self.report()
+
+    def report(self):
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
@@ -0,0 +1,29 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.sellers.importers import IMPORT_FORMATS, ProductImporter
+from apps.sellers.models import Seller
+
+
+class Command(BaseCommand):
+    help = "Streams a CSV/JSONL catalog file into products of a seller"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--seller", required=True, help="Seller slug")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        seller = Seller.objects.get_or_none(slug=options["seller"])
+        if seller is None:
+            raise CommandError(f"Seller {options['seller']!r} does not exist")
+        file_format = options["format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f"Unsupported format {file_format!r}, expected one of {IMPORT_FORMATS}")
+        with open(options["path"], "rb") as stream:
+            report = ProductImporter(seller, batch_size=options["batch_size"]).run(stream, file_format)
+        for error in report["errors"]:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(self.style.SUCCESS(f"Created {report['created']} products, {report['failed']} rows failed"))
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 05:58
+
+import apps.common.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0001_initial'),
+    ]
+
+    operations = [
+        # default - только атрибут Python, схема БД не меняется;
+        # без SeparateDatabaseAndState SQLite пересоздал бы таблицы целиком
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='seller',
+                    name='id',
+                    field=models.UUIDField(default=apps.common.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
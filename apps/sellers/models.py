@@ -3,6 +3,7 @@ from django.db import models
 
 from apps.accounts.models import User
 from apps.common.models import BaseModel
+from apps.common.versions import bump_versions
 
 
 class Seller(BaseModel):
@@ -31,5 +32,34 @@ class Seller(BaseModel):
     # Status fields
     is_approved = models.BooleanField(default=False)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Статус одобрения попадает в claims токенов пользователя
+        instance._stored_approved = instance.__dict__.get("is_approved")
+        return instance
+
+    def save(self, *args, **kwargs):
+        changed = self._state.adding or getattr(self, "_stored_approved", None) != self.is_approved
+        super().save(*args, **kwargs)
+        if changed:
+            User.bump_auth_version(self.user_id)
+        else:
+            User.invalidate_auth_snapshot(self.user_id)
+        # Данные продавца входят в карточки товаров
+        bump_versions("seller", f"seller:{self.pk}")
+        self._stored_approved = self.is_approved
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        User.bump_auth_version(self.user_id)
+        bump_versions("seller", f"seller:{self.pk}")
+        return result
+
+    @property
+    def media_prefix(self):
+        """Папка картинок продавца в MEDIA_ROOT: массовый импорт ссылается только на неё"""
+        return f"product_images/{self.pk}/"
+
     def __str__(self):
         return f"Seller for {self.business_name}"
@@ -1,3 +1,165 @@
-from django.test import TestCase
+import io
+import json
+from unittest import mock
 
-# Create your tests here.
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.profiles.models import Order, OrderItem
+from apps.sellers.importers import ProductImporter
+from apps.sellers.models import Seller
+from apps.shop.exports import ORDER_ITEM_EXPORT_COLUMNS, order_item_export_rows
+from apps.shop.models import Category, Product
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class SellerOrdersViewTests(TestCase):
+    def setUp(self):
+        self.seller_user = User.objects.create_user("Seller", "User", "seller@example.com", "pass", account_type="SELLER")
+        self.seller = Seller.objects.create(user=self.seller_user, business_name="Shop", is_approved=True)
+        self.buyer = User.objects.create_user("Buyer", "User", "buyer@example.com", "pass")
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.product = Product.objects.create(
+            seller=self.seller, name="Phone", desc="desc", price_current="10.50", category=category
+        )
+        self.other_product = Product.objects.create(name="Case", desc="desc", price_current="2.00", category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller_user)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.buyer)
+            OrderItem.objects.create(user=self.buyer, order=order, product=self.product, quantity=2)
+            OrderItem.objects.create(user=self.buyer, order=order, product=self.other_product, quantity=1)
+
+    def get_orders(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/sellers/orders/")
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_totals_are_computed_in_sql(self):
+        self.create_orders(1)
+        data, _ = self.get_orders()
+        self.assertEqual(len(data), 1)
+        self.assertEqual(data[0]["subtotal"], "23.00")
+        self.assertEqual(data[0]["total"], "23.00")
+        self.assertEqual(data[0]["email"], "buyer@example.com")
+
+    def test_query_count_does_not_depend_on_order_count(self):
+        self.create_orders(2)
+        _, queries_for_two = self.get_orders()
+        self.create_orders(8)
+        data, queries_for_ten = self.get_orders()
+        self.assertEqual(len(data), 10)
+        self.assertEqual(queries_for_two, queries_for_ten)
+        # seller (IsSeller) + orders with user and totals
+        self.assertLessEqual(queries_for_ten, 2)
+
+    def test_export_contents(self):
+        self.create_orders(3)
+        response = self.client.get("/sellers/orders/export/")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(","), ORDER_ITEM_EXPORT_COLUMNS)
+        # Только позиции товаров продавца, цены с двумя знаками
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(all(line.endswith(",phone,Phone,2,10.50,21.00") for line in lines[1:]))
+
+        response = self.client.get("/sellers/orders/export/?export_format=ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(list(rows[0]), ORDER_ITEM_EXPORT_COLUMNS)
+        self.assertEqual(rows[0]["customer_email"], "buyer@example.com")
+        self.assertEqual((rows[0]["price"], rows[0]["line_total"]), ("10.50", "21.00"))
+
+        # Чанки по id отдают каждую строку ровно один раз
+        chunked = list(order_item_export_rows(seller=self.seller, chunk_size=2))
+        expected = sorted(OrderItem.objects.filter(product=self.product).values_list("id", flat=True))
+        self.assertEqual([row["id"] for row in chunked], expected)
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class SellerProductsViewTests(TestCase):
+    def setUp(self):
+        self.seller_user = User.objects.create_user("Seller", "User", "seller@example.com", "pass", account_type="SELLER")
+        self.seller = Seller.objects.create(user=self.seller_user, business_name="Shop", is_approved=True)
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        for index in range(7):
+            Product.objects.create(
+                seller=self.seller, name=f"Phone {index}", desc="desc", price_current="10.00", category=category
+            )
+        Product.objects.create(name="Other", desc="desc", price_current="2.00", category=category)
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller_user)
+
+    def walk(self, url):
+        slugs, sizes = [], []
+        while url:
+            data = self.client.get(url).data
+            slugs += [product["slug"] for product in data["results"]]
+            sizes.append(len(data["results"]))
+            url = data["next"]
+        return slugs, sizes
+
+    def test_pages(self):
+        first = self.client.get("/sellers/products/", {"page_size": 3}).data
+        self.assertEqual(first["count"], 7)
+        self.assertIn("page=2", first["next"])
+
+        expected = list(Product.objects.filter(seller=self.seller).values_list("slug", flat=True))
+        self.assertEqual(self.walk("/sellers/products/?page_size=3"), (expected, [3, 3, 1]))
+        # Одна цена у всех: курсор идёт по (price_current, id) без повторов и пропусков
+        by_price = list(Product.objects.filter(seller=self.seller).order_by("-price_current", "-id")
+                        .values_list("slug", flat=True))
+        slugs, _ = self.walk("/sellers/products/?cursor=&ordering=-price_current&page_size=3")
+        self.assertEqual(slugs, by_price)
+
+
+class ProductImporterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("Seller", "User", "seller@example.com", "pass", account_type="SELLER")
+        self.seller = Seller.objects.create(user=user, business_name="Shop", is_approved=True)
+        Category.objects.create(name="Phones", image="category_images/phones.jpg")
+
+    def run_import(self, rows):
+        lines = "\n".join(json.dumps(row) for row in rows)
+        return ProductImporter(self.seller, batch_size=10).run(io.BytesIO(lines.encode()), "jsonl")
+
+    def row(self, name, **fields):
+        return {"name": name, "desc": "desc", "price_current": "10.00", "category_slug": "phones", "in_stock": 3, **fields}
+
+    def test_rows_are_validated(self):
+        prefix = self.seller.media_prefix
+        report = self.run_import([
+            self.row("Phone", image1=f"{prefix}phone.jpg"),
+            self.row("Tablet", category_slug="tablets"),
+            self.row("Foreign", image1="product_images/other-seller/phone.jpg"),
+            self.row("Escape", image2=f"{prefix}../other-seller/phone.jpg"),
+        ])
+        self.assertEqual((report["created"], report["failed"]), (1, 3))
+        self.assertEqual([error["row"] for error in report["errors"]], [2, 3, 4])
+        self.assertIn("category_slug", report["errors"][0]["errors"])
+        self.assertIn("image1", report["errors"][1]["errors"])
+        self.assertIn("image2", report["errors"][2]["errors"])
+        product = Product.objects.get(seller=self.seller)
+        self.assertEqual(product.image1.name, f"{prefix}phone.jpg")
+
+    def test_integrity_error_is_reported_on_its_row(self):
+        bulk_create = Product.objects.bulk_create
+
+        def failing_bulk_create(products, *args, **kwargs):
+            if any(product.name == "Broken" for product in products):
+                raise IntegrityError("CHECK constraint failed: in_stock")
+            return bulk_create(products, *args, **kwargs)
+
+        with mock.patch.object(Product.objects, "bulk_create", side_effect=failing_bulk_create):
+            report = self.run_import([self.row("Phone"), self.row("Broken"), self.row("Case")])
+        self.assertEqual((report["created"], report["failed"]), (2, 1))
+        self.assertEqual(report["errors"], [
+            {"row": 2, "errors": {"non_field_errors": ["CHECK constraint failed: in_stock"]}},
+        ])
+        self.assertEqual(set(Product.objects.values_list("name", flat=True)), {"Phone", "Case"})
@@ -1,12 +1,14 @@
 from django.urls import path
 
 from apps.sellers.views import SellersView, SellerProductsView, SellerProductView, SellerOrdersView, \
-    SellerOrderItemsView
+    SellerOrderItemsView, SellerProductsImportView, SellerOrdersExportView
 
 urlpatterns = [
     path("", SellersView.as_view()),
     path("products/", SellerProductsView.as_view()),
+    path("products/import/", SellerProductsImportView.as_view()),
     path("products/<slug:slug>/", SellerProductView.as_view()),    # New
     path("orders/", SellerOrdersView.as_view()),
+    path("orders/export/", SellerOrdersExportView.as_view()),
     path("orders/<str:tx_ref>/", SellerOrderItemsView.as_view()),
 ]
\ No newline at end of file
@@ -1,11 +1,18 @@
 from drf_spectacular.utils import extend_schema
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from apps.common.exports import EXPORT_FORMATS, export_response
 from apps.common.permissions import IsSeller
 from apps.common.utils import set_dict_attr
+from apps.common.views import PaginatedListView
 from apps.profiles.exceptions import ObjectNotFound
+from apps.shop.exports import ORDER_ITEM_EXPORT_COLUMNS, order_item_export_rows
+from apps.shop.filters import ProductFilter
 from apps.shop.models import Category, Product
+from apps.shop.schema_examples import PRODUCT_PARAM_EXAMPLE, EXPORT_PARAM_EXAMPLE
+from apps.sellers.importers import IMPORT_FORMATS, ProductImporter
 from apps.sellers.models import Seller
 from apps.sellers.serializers import SellerSerializer
 from apps.profiles.models import Order, OrderItem
@@ -39,24 +46,25 @@ class SellersView(APIView):
             return Response(data=serializer.errors, status=400)
 
 
-class SellerProductsView(APIView):
+class SellerProductsView(PaginatedListView):
     serializer_class = ProductSerializer
+    filterset_class = ProductFilter
     permission_classes = [IsSeller]
 
     @extend_schema(
         summary="Seller Products Fetch",
         description="""
             This endpoint returns all products from a seller.
-            Products can be filtered by name, sizes or colors.
+            Products can be filtered by price, stock or date created.
         """,
-        tags=tags, )
+        tags=tags,
+        parameters=PRODUCT_PARAM_EXAMPLE, )
     def get(self, request, *args, **kwargs):
         seller = Seller.objects.get_or_none(user=request.user, is_approved=True)
         if not seller:
             return Response(data={"message": "Access is denied"}, status=403)
         products = Product.objects.select_related("category", "seller", "seller__user").filter(seller=seller)
-        serializer = self.serializer_class(products, many=True)
-        return Response(data=serializer.data, status=200)
+        return self.paginated_response(request, products)
 
     @extend_schema(
         summary="Create a product",
@@ -87,6 +95,44 @@ class SellerProductsView(APIView):
             return Response(serializer.errors, status=400)
 
 
+class SellerProductsImportView(APIView):
+    permission_classes = [IsSeller]
+    parser_classes = [MultiPartParser]
+
+    @extend_schema(
+        summary="Seller Products Bulk Import",
+        description=f"""
+            This endpoint imports many products from a CSV or JSONL file (field "file").
+            Columns/keys match the product create endpoint ({", ".join(CreateProductSerializer().fields)}),
+            images are paths inside the seller's folder of MEDIA_ROOT (product_images/<seller id>/).
+            The format is taken from the "format" field or the file extension.
+            Returns counts and a per-row error report.
+        """,
+        tags=tags,
+        request={
+            "multipart/form-data": {
+                "type": "object",
+                "properties": {
+                    "file": {"type": "string", "format": "binary"},
+                    "format": {"type": "string", "enum": list(IMPORT_FORMATS)},
+                },
+            }
+        },
+    )
+    def post(self, request, *args, **kwargs):
+        seller = Seller.objects.get_or_none(user=request.user, is_approved=True)
+        if not seller:
+            return Response(data={"message": "Access is denied"}, status=403)
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(data={"message": "No file uploaded"}, status=400)
+        file_format = request.data.get("format") or upload.name.rsplit(".", 1)[-1].lower()
+        if file_format not in IMPORT_FORMATS:
+            return Response(data={"message": f"Unsupported format, expected one of {IMPORT_FORMATS}"}, status=400)
+        report = ProductImporter(seller).run(upload.file, file_format)
+        return Response(data=report, status=201 if report["created"] else 400)
+
+
 class SellerProductView(APIView):
     serializer_class = CreateProductSerializer
     permission_classes = [IsSeller]
@@ -158,15 +204,40 @@ class SellerOrdersView(APIView):
     )
     def get(self, request):
         seller = request.user.seller
+        seller_order_ids = OrderItem.objects.filter(product__seller=seller).values("order_id")
         orders = (
-            Order.objects.filter(orderitems__product__seller=seller)
-            .distinct()
+            Order.objects.with_totals()
+            .filter(id__in=seller_order_ids)
+            .select_related("user")
             .order_by("-created_at")
         )
         serializer = self.serializer_class(orders, many=True)
         return Response(data=serializer.data, status=200)
 
 
+class SellerOrdersExportView(APIView):
+    permission_classes = [IsSeller]
+
+    @extend_schema(
+        summary="Seller Orders Export",
+        description="""
+            This endpoint streams all ordered items of the seller's products as CSV or NDJSON
+            (?export_format=, defaults to csv), one row per order item.
+        """,
+        tags=tags,
+        parameters=EXPORT_PARAM_EXAMPLE,
+    )
+    def get(self, request):
+        seller = Seller.objects.get_or_none(user=request.user)
+        if not seller:
+            return Response(data={"message": "Access is denied"}, status=403)
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response({"message": f"Unsupported format, expected one of {list(EXPORT_FORMATS)}"}, status=400)
+        rows = order_item_export_rows(seller=seller)
+        return export_response(rows, ORDER_ITEM_EXPORT_COLUMNS, export_format, "orders")
+
+
 class SellerOrderItemsView(APIView):
     serializer_class = CheckItemOrderSerializer
     permission_classes = [IsSeller]
@@ -185,6 +256,8 @@ class SellerOrderItemsView(APIView):
         order = Order.objects.get_or_none(tx_ref=kwargs["tx_ref"])
         if not order:
             return Response(data={"message": "Order does not exist!"}, status=404)
-        order_items = OrderItem.objects.filter(order=order, product__seller=seller)
+        order_items = OrderItem.objects.filter(order=order, product__seller=seller).select_related(
+            "product", "product__category", "product__seller", "product__seller__user"
+        )
         serializer = self.serializer_class(order_items, many=True)
         return Response(data=serializer.data, status=200)
\ No newline at end of file
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ShopConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'apps.shop'
\ No newline at end of file
+    name = 'apps.shop'
+
+    def ready(self):
+        from apps.shop.search import ensure_search_index
+
+        post_migrate.connect(ensure_search_index, sender=self)
@@ -0,0 +1,213 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from apps.profiles.models import DirtyCart, OrderItem
+from apps.shop.models import Product
+
+DEFAULT_CART_BACKEND = "apps.shop.carts.DatabaseCart"
+
+logger = logging.getLogger("apps.carts")
+
+
+def get_cart(user):
+    """Returns the cart of a user using the backend from settings.CART_BACKEND."""
+    backend = import_string(getattr(settings, "CART_BACKEND", DEFAULT_CART_BACKEND))
+    return backend(user)
+
+
+class DatabaseCart:
+    """
+    The cart stored directly as OrderItem rows with order=None (default backend).
+
+    Methods:
+        get_items(): Returns the cart items, newest first.
+        set_item(product, quantity): Adds/updates/removes a product; returns (item or None, created).
+        set_items(quantities): Applies many {product: quantity} changes at once.
+        persist(): Makes sure the OrderItem rows reflect the cart (before checkout).
+        clear(): Forgets the cart after checkout.
+    """
+
+    def __init__(self, user):
+        self.user = user
+
+    def get_items(self):
+        return OrderItem.objects.filter(user=self.user, order=None).select_related(
+            "product", "product__seller", "product__seller__user")
+
+    def set_item(self, product, quantity):
+        orderitem, created = OrderItem.objects.update_or_create(
+            user=self.user,
+            order=None,
+            product=product,
+            defaults={"quantity": quantity},
+        )
+        if orderitem.quantity == 0:
+            orderitem.delete()
+            return None, created
+        return orderitem, created
+
+    def set_items(self, quantities):
+        """
+        Applies many {product: quantity} changes at once (quantity 0 removes),
+        with one bulk_create, one bulk_update and one delete.
+        """
+        with transaction.atomic():
+            existing = {
+                item.product_id: item
+                for item in OrderItem.objects.filter(
+                    user=self.user, order=None, product_id__in=[product.pk for product in quantities]
+                )
+            }
+            to_create, to_update, to_delete = [], [], []
+            for product, quantity in quantities.items():
+                item = existing.get(product.pk)
+                if quantity == 0:
+                    if item is not None:
+                        to_delete.append(item.id)
+                elif item is None:
+                    to_create.append(OrderItem(user=self.user, product=product, quantity=quantity))
+                elif item.quantity != quantity:
+                    item.quantity = quantity
+                    to_update.append(item)
+            OrderItem.objects.bulk_create(to_create)
+            OrderItem.objects.bulk_update(to_update, ["quantity"])
+            if to_delete:
+                OrderItem.objects.filter(id__in=to_delete).delete()
+
+    def persist(self):
+        pass
+
+    def clear(self):
+        pass
+
+
+class CacheCart(DatabaseCart):
+    """
+    The working cart kept in Django's cache as {product_id: quantity}.
+
+    Toggling items costs only a cache write; OrderItem rows are written behind,
+    at checkout (persist) or by the flush_carts command. The first change after
+    a write queues the cart in the DirtyCart table (a per-user marker key in the
+    cache skips the query for the following changes), so concurrent toggles of
+    different carts cannot lose each other's marks and the queue survives cache
+    eviction. A cart missing from the cache is loaded from its persisted
+    OrderItem rows; changes of a cart evicted before the flush are lost and
+    reported by flush_carts. Concurrent toggles of the same cart are last-write-wins.
+    """
+
+    def __init__(self, user):
+        super().__init__(user)
+        self.cache = caches[getattr(settings, "CART_CACHE_ALIAS", "default")]
+        self.timeout = getattr(settings, "CART_CACHE_TIMEOUT", 60 * 60 * 24 * 7)
+        self.key = f"cart:{user.pk}"
+        self.dirty_key = f"cart:dirty:{user.pk}"
+
+    def _load(self):
+        data = self.cache.get(self.key)
+        if data is None:
+            # Старые позиции первыми, чтобы порядок вставки совпадал с created_at
+            rows = OrderItem.objects.filter(user=self.user, order=None).order_by("created_at")
+            data = {str(product_id): quantity for product_id, quantity in rows.values_list("product_id", "quantity")}
+            self.cache.set(self.key, data, self.timeout)
+        return data
+
+    def _save(self, data):
+        self.cache.set(self.key, data, self.timeout)
+        self._mark_dirty()
+
+    def _mark_dirty(self):
+        # add атомарен: в очередь идёт только первая правка после записи в БД
+        if self.cache.add(self.dirty_key, True, self.timeout):
+            DirtyCart.objects.get_or_create(user=self.user)
+
+    def get_items(self):
+        data = self._load()
+        products = {
+            str(pk): product
+            for pk, product in Product.objects.select_related("seller", "seller__user").in_bulk(list(data)).items()
+        }
+        items = [
+            OrderItem(user=self.user, product=products[product_id], quantity=quantity)
+            for product_id, quantity in data.items()
+            if product_id in products
+        ]
+        items.reverse()
+        return items
+
+    def set_item(self, product, quantity):
+        data = self._load()
+        product_id = str(product.pk)
+        created = product_id not in data
+        if quantity == 0:
+            data.pop(product_id, None)
+            self._save(data)
+            return None, created
+        data[product_id] = quantity
+        self._save(data)
+        return OrderItem(user=self.user, product=product, quantity=quantity), created
+
+    def set_items(self, quantities):
+        data = self._load()
+        for product, quantity in quantities.items():
+            if quantity == 0:
+                data.pop(str(product.pk), None)
+            else:
+                data[str(product.pk)] = quantity
+        self._save(data)
+
+    def persist(self):
+        """Writes the cached cart to OrderItem; returns False if the cart is not in the cache"""
+        # Сначала снимаем отметку, потом читаем корзину: правка, пришедшая после
+        # чтения, снова поставит корзину в очередь
+        DirtyCart.objects.filter(user=self.user).delete()
+        self.cache.delete(self.dirty_key)
+        data = self.cache.get(self.key)
+        if data is None:
+            return False
+        try:
+            self._write(data)
+        except Exception:
+            self._mark_dirty()
+            raise
+        return True
+
+    def _write(self, data):
+        with transaction.atomic():
+            existing = {
+                str(item.product_id): item
+                for item in OrderItem.objects.filter(user=self.user, order=None)
+            }
+            to_create, to_update = [], []
+            for product_id, quantity in data.items():
+                item = existing.pop(product_id, None)
+                if item is None:
+                    to_create.append(OrderItem(user=self.user, product_id=product_id, quantity=quantity))
+                elif item.quantity != quantity:
+                    item.quantity = quantity
+                    to_update.append(item)
+            OrderItem.objects.bulk_create(to_create)
+            OrderItem.objects.bulk_update(to_update, ["quantity"])
+            if existing:
+                OrderItem.objects.filter(id__in=[item.id for item in existing.values()]).delete()
+
+    def clear(self):
+        self.cache.delete(self.key)
+
+    @classmethod
+    def flush(cls):
+        """
+        Persists every queued cart. Returns (flushed, evicted): carts whose
+        cache entry is gone keep their previous OrderItem rows.
+        """
+        flushed = evicted = 0
+        for dirty in list(DirtyCart.objects.select_related("user")):
+            if cls(dirty.user).persist():
+                flushed += 1
+            else:
+                evicted += 1
+                logger.warning("Cart of user %s was evicted from the cache before it was flushed", dirty.user_id)
+        return flushed, evicted
@@ -0,0 +1,273 @@
+import hashlib
+import io
+import itertools
+import multiprocessing
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+
+from apps.accounts.models import User
+from apps.common.fields import assign_unique_slugs
+from apps.common.utils import UUID7Generator, generate_unique_codes
+from apps.profiles.models import Order, OrderItem, ProductReview
+from apps.sellers.models import Seller
+from apps.shop.models import Category, Product
+
+# Размер набора задаётся числом товаров, остальные таблицы по умолчанию считаются от него
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DATASET_EPOCH_MS = 1735689600000  # 2025-01-01 UTC, основа детерминированных id
+DATASET_PASSWORD = "bench-password"
+# У каждой таблицы свой диапазон миллисекунд в id, чтобы id разных таблиц не пересекались
+KIND_OFFSETS_MS = {
+    kind: index * 10 ** 9
+    for index, kind in enumerate(["user", "seller", "category", "product", "order", "orderitem", "review"])
+}
+MAX_ITEMS_PER_ORDER = 4
+
+ADJECTIVES = ["Smart", "Classic", "Compact", "Wireless", "Premium", "Eco", "Ultra", "Mini", "Pro", "Retro"]
+NOUNS = ["Phone", "Laptop", "Headphones", "Watch", "Camera", "Speaker", "Keyboard", "Mouse", "Monitor", "Tablet"]
+FIRST_NAMES = ["Ivan", "Anna", "Petr", "Olga", "Sergey", "Maria", "Dmitry", "Elena"]
+LAST_NAMES = ["Petrov", "Ivanova", "Sidorov", "Smirnova", "Kuznetsov", "Popova"]
+RATING_WEIGHTS = [5, 10, 20, 30, 35]  # 1..5 звёзд
+
+# Набор, который строят дочерние процессы (наследуется при fork, не пиклится)
+_active_dataset = None
+
+
+def parse_scale(value):
+    """'10k' / '100k' / '1m' or a plain number"""
+    value = str(value).lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(value)
+
+
+def dataset_id(seed, kind, index):
+    """A UUID v7 that depends only on (seed, table, row index), so rows can reference each other across chunks."""
+    digest = int.from_bytes(hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=10).digest(), "big")
+    return UUID7Generator.build(
+        DATASET_EPOCH_MS + KIND_OFFSETS_MS[kind] + index, digest >> 62 & 0xFFF, digest & (1 << 62) - 1
+    )
+
+
+def dataset_id_range(kind, count):
+    """(first, last) possible ids of a table's rows, for range filters over generated rows"""
+    start_ms = DATASET_EPOCH_MS + KIND_OFFSETS_MS[kind]
+    return UUID7Generator.build(start_ms, 0, 0), UUID7Generator.build(start_ms + count, 0xFFF, (1 << 62) - 1)
+
+
+def zipf_cum_weights(count, skew):
+    """Cumulative weights 1/rank**skew for random.choices; None means uniform."""
+    if not skew:
+        return None
+    return list(itertools.accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def _build_chunk(job):
+    phase, chunk = job
+    return getattr(_active_dataset, f"build_{phase}")(chunk)
+
+
+def _close_connections():
+    # Соединения родителя после fork не используются, у каждого процесса свои
+    connections.close_all()
+
+
+class SyntheticDataset:
+    """
+    Deterministic synthetic shop data built with bulk_create.
+
+    Rows are produced in chunks of batch_size; every chunk has its own seeded
+    random.Random and every id is derived from (seed, table, row index), so the
+    result does not depend on the number of workers. With workers > 1 chunks of
+    one table are built by a pool of forked processes (each with its own DB
+    connection); tables are built one after another.
+
+    Popularity is skewed with a Zipf law: review_skew for reviews per product,
+    order_skew for orders per user (0 - uniform). Low row indexes are the
+    popular ones.
+
+    Only created_at and tx_ref depend on the run.
+    """
+
+    categories = 50
+
+    def __init__(self, products, users=None, sellers=None, orders=None, reviews=None, seed=42,
+                 batch_size=2000, review_skew=0.0, order_skew=0.0, workers=1, stdout=None):
+        self.products = products
+        self.users = users if users is not None else max(products // 20, 20)
+        self.sellers = min(sellers if sellers is not None else max(self.users // 10, 2), self.users)
+        self.orders = orders if orders is not None else products // 2
+        self.reviews = reviews if reviews is not None else products
+        self.seed = seed
+        self.batch_size = batch_size
+        self.review_skew = review_skew
+        self.order_skew = order_skew
+        self.workers = workers
+        self.stdout = stdout
+
+    def log(self, message):
+        if self.stdout is not None:
+            self.stdout.write(message)
+
+    def chunk_random(self, kind, chunk):
+        return random.Random(f"{self.seed}:{kind}:{chunk}")
+
+    def chunk_range(self, chunk, total):
+        start = chunk * self.batch_size
+        return range(start, min(start + self.batch_size, total))
+
+    def new_id(self, kind, index):
+        return dataset_id(self.seed, kind, index)
+
+    def insert(self, model, rows):
+        with transaction.atomic():
+            model._base_manager.bulk_create(rows, batch_size=self.batch_size)
+
+    def run_phase(self, phase, total):
+        global _active_dataset
+        started = time.perf_counter()
+        chunks = -(-total // self.batch_size)
+        jobs = [(phase, chunk) for chunk in range(chunks)]
+        if self.workers > 1 and chunks > 1:
+            _active_dataset = self
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with context.Pool(self.workers, initializer=_close_connections) as pool:
+                created = sum(pool.imap_unordered(_build_chunk, jobs))
+            _active_dataset = None
+        else:
+            created = sum(getattr(self, f"build_{phase}")(chunk) for _, chunk in jobs)
+        self.log(f"{phase}: {created} in {time.perf_counter() - started:.1f}s")
+        return created
+
+    def build(self):
+        """Creates all rows and returns the row counts per model."""
+        self.password = make_password(DATASET_PASSWORD)
+        # Веса считаются один раз в родителе, процессы получают их через fork
+        self.order_user_weights = zipf_cum_weights(self.users, self.order_skew)
+        self.review_product_weights = zipf_cum_weights(self.products, self.review_skew)
+
+        counts = {
+            "users": self.run_phase("users", self.users),
+            "categories": self.run_phase("categories", self.categories),
+            "products": self.run_phase("products", self.products),
+            "orders": self.run_phase("orders", self.orders),
+            "reviews": self.run_phase("reviews", self.reviews),
+        }
+        counts["sellers"] = self.sellers
+        self.finalize()
+        return counts
+
+    def finalize(self):
+        """Denormalized values that save() would have maintained, computed in SQL"""
+        order_ids = dataset_id_range("order", self.orders)
+        OrderItem._base_manager.filter(order__id__range=order_ids, unit_price__isnull=True).update(
+            unit_price=Subquery(Product._base_manager.filter(pk=OuterRef("product_id")).values("price_current")[:1])
+        )
+        order_subtotal = Subquery(
+            OrderItem._base_manager.filter(order=OuterRef("pk")).order_by().values("order")
+            .annotate(subtotal=Sum(F("unit_price") * F("quantity"))).values("subtotal")[:1]
+        )
+        Order._base_manager.filter(pk__range=order_ids, subtotal__isnull=True).update(
+            subtotal=order_subtotal, total=order_subtotal
+        )
+        call_command("rebuild_product_ratings", stdout=self.stdout or io.StringIO())
+
+    def pick(self, rng, count, cum_weights):
+        if cum_weights is None:
+            return rng.randrange(count)
+        return rng.choices(range(count), cum_weights=cum_weights)[0]
+
+    def build_users(self, chunk):
+        rng = self.chunk_random("user", chunk)
+        users, sellers = [], []
+        for index in self.chunk_range(chunk, self.users):
+            is_seller = index < self.sellers
+            user = User(
+                id=self.new_id("user", index), email=f"user{index}@example.com", password=self.password,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                account_type="SELLER" if is_seller else "BUYER",
+            )
+            users.append(user)
+            if is_seller:
+                sellers.append(Seller(
+                    id=self.new_id("seller", index), user=user, business_name=f"Shop {index}",
+                    inn_identification_number=str(index), phone_number="123",
+                    business_description="Synthetic seller", business_address="Street 1", city="City",
+                    postal_code="123456", bank_name="Bank", bank_bic_number="000000000",
+                    bank_account_number=str(index), bank_routing_number=str(index), is_approved=True,
+                ))
+        self.insert(User, users)
+        self.insert(Seller, sellers)
+        return len(users)
+
+    def build_categories(self, chunk):
+        categories = [
+            Category(id=self.new_id("category", index), name=f"Category {index:02d}",
+                     image="category_images/default.jpg")
+            for index in self.chunk_range(chunk, self.categories)
+        ]
+        self.insert(Category, categories)
+        return len(categories)
+
+    def build_products(self, chunk):
+        rng = self.chunk_random("product", chunk)
+        products = []
+        for index in self.chunk_range(chunk, self.products):
+            price = Decimal(rng.randint(100, 200_000)) / 100
+            products.append(Product(
+                id=self.new_id("product", index),
+                name=f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index}",
+                desc="Synthetic product description",
+                price_current=price,
+                price_old=price * 2 if rng.random() < 0.2 else None,
+                seller_id=self.new_id("seller", rng.randrange(self.sellers)),
+                category_id=self.new_id("category", rng.randrange(self.categories)),
+                in_stock=0 if rng.random() < 0.1 else rng.randint(1, 100),
+            ))
+        # Номер товара в названии делает базы slug уникальными: без подбора суффиксов
+        assign_unique_slugs(products)
+        self.insert(Product, products)
+        return len(products)
+
+    def build_orders(self, chunk):
+        rng = self.chunk_random("order", chunk)
+        indexes = self.chunk_range(chunk, self.orders)
+        orders, items = [], []
+        for index, tx_ref in zip(indexes, generate_unique_codes(len(indexes))):
+            user_id = self.new_id("user", self.pick(rng, self.users, self.order_user_weights))
+            order = Order(
+                id=self.new_id("order", index), user_id=user_id, tx_ref=tx_ref,
+                full_name="Synthetic Buyer", email="buyer@example.com", phone="123",
+                address="Street 1", city="City", country="Country", zipcode="123456",
+            )
+            orders.append(order)
+            # unit_price и суммы заказа заполняются в finalize() одним UPDATE
+            for line in range(rng.randint(1, MAX_ITEMS_PER_ORDER)):
+                items.append(OrderItem(
+                    id=self.new_id("orderitem", index * MAX_ITEMS_PER_ORDER + line), user_id=user_id, order=order,
+                    product_id=self.new_id("product", rng.randrange(self.products)), quantity=rng.randint(1, 3),
+                ))
+        self.insert(Order, orders)
+        self.insert(OrderItem, items)
+        return len(orders)
+
+    def build_reviews(self, chunk):
+        rng = self.chunk_random("review", chunk)
+        reviews = [
+            ProductReview(
+                id=self.new_id("review", index),
+                user_id=self.new_id("user", rng.randrange(self.users)),
+                product_id=self.new_id("product", self.pick(rng, self.products, self.review_product_weights)),
+                rating=rng.choices(range(1, 6), weights=RATING_WEIGHTS)[0], text="Synthetic review",
+            )
+            for index in self.chunk_range(chunk, self.reviews)
+        ]
+        self.insert(ProductReview, reviews)
+        return len(reviews)
@@ -0,0 +1,11 @@
+from rest_framework.exceptions import APIException
+
+
+class OutOfStock(APIException):
+    status_code = 409
+    default_detail = 'Недостаточно товара на складе'
+    default_code = 'out_of_stock'
+
+    def __init__(self, product_slugs=None):
+        detail = {"message": self.default_detail, "products": product_slugs or []}
+        super().__init__(detail=detail)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.db.models.functions import Coalesce
+
+from apps.common.exports import keyset_iterator
+from apps.profiles.models import OrderItem
+from apps.shop.models import Product
+
+PRICE_FIELD = DecimalField(max_digits=12, decimal_places=2)
+CENTS = Decimal("0.01")
+
+PRODUCT_EXPORT_COLUMNS = [
+    "id", "name", "slug", "desc", "price_old", "price_current", "in_stock", "category_slug", "seller_slug",
+    "rating_count", "avg_rating", "created_at", "updated_at",
+]
+
+ORDER_ITEM_EXPORT_COLUMNS = [
+    "id", "tx_ref", "ordered_at", "delivery_status", "payment_status", "customer_email", "full_name",
+    "city", "country", "product_slug", "product_name", "quantity", "price", "line_total",
+]
+
+
+def product_export_rows(chunk_size=2000):
+    queryset = Product.objects.values(
+        "id", "name", "slug", "desc", "price_old", "price_current", "in_stock",
+        "rating_count", "avg_rating", "created_at", "updated_at",
+        category_slug=F("category__slug"), seller_slug=F("seller__slug"),
+    )
+    return keyset_iterator(queryset, chunk_size)
+
+
+def order_item_export_rows(seller=None, chunk_size=2000):
+    """Ordered items, limited to the products of a seller like in SellerOrdersView"""
+    queryset = OrderItem.objects.filter(order__isnull=False)
+    if seller is not None:
+        queryset = queryset.filter(product__seller=seller)
+    queryset = queryset.values(
+        "id", "quantity",
+        tx_ref=F("order__tx_ref"),
+        ordered_at=F("order__created_at"),
+        delivery_status=F("order__delivery_status"),
+        payment_status=F("order__payment_status"),
+        customer_email=F("order__user__email"),
+        full_name=F("order__full_name"),
+        city=F("order__city"),
+        country=F("order__country"),
+        product_slug=F("product__slug"),
+        product_name=F("product__name"),
+        # Для заказов до фиксации цен берём текущую цену товара
+        price=Coalesce("unit_price", "product__price_current", output_field=PRICE_FIELD),
+        line_total=ExpressionWrapper(
+            Coalesce("unit_price", "product__price_current") * F("quantity"), output_field=PRICE_FIELD
+        ),
+    )
+    for row in keyset_iterator(queryset, chunk_size):
+        # SQLite не приводит вычисляемые Decimal к 2 знакам
+        row["price"] = row["price"].quantize(CENTS)
+        row["line_total"] = row["line_total"].quantize(CENTS)
+        yield row
@@ -0,0 +1,121 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Q
+
+# Границы ценовых корзин: [0, 50), [50, 100), ..., [1000, ∞)
+PRICE_BUCKET_EDGES = (0, 50, 100, 500, 1000)
+# Фильтры, которые сами являются фасетами: при подсчёте своего фасета они не применяются
+FACET_FILTERS = ("min_price", "max_price", "in_stock")
+FACETS_VERSION_KEY = "facets:version"
+
+
+def _cache():
+    return caches[settings.FACETS_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Если ключ версии вытеснили, счётчик не должен начаться заново и попасть на старые записи
+    return int(time.time() * 1000)
+
+
+def invalidate_facets():
+    """Drops every cached facet aggregation by bumping the shared version."""
+    cache = _cache()
+    try:
+        cache.incr(FACETS_VERSION_KEY)
+    except ValueError:
+        cache.add(FACETS_VERSION_KEY, _initial_version(), timeout=None)
+
+
+def price_buckets():
+    bounds = list(PRICE_BUCKET_EDGES) + [None]
+    return list(zip(bounds, bounds[1:]))
+
+
+def _price_q(low, high):
+    q = Q(price_current__gte=low)
+    if high is not None:
+        q &= Q(price_current__lt=high)
+    return q
+
+
+def compute_facets(filterset):
+    """
+    Counts category, price bucket and stock facets for a bound, valid
+    ProductFilter with a single GROUP BY category query.
+
+    Facets are disjunctive: the price facet ignores the price filters and the
+    stock facet ignores in_stock, so every facet shows what the visitor would
+    get by changing that facet alone. Category counts respect all filters.
+    """
+    cleaned = filterset.form.cleaned_data
+    queryset = filterset.queryset
+    for name, value in cleaned.items():
+        if name not in FACET_FILTERS:
+            queryset = filterset.filters[name].filter(queryset, value)
+
+    price_q = Q()
+    if cleaned.get("min_price") is not None:
+        price_q &= Q(price_current__gte=cleaned["min_price"])
+    if cleaned.get("max_price") is not None:
+        price_q &= Q(price_current__lte=cleaned["max_price"])
+    stock_q = Q()
+    if cleaned.get("in_stock") is not None:
+        stock_q &= Q(in_stock__gte=cleaned["in_stock"])
+
+    buckets = price_buckets()
+    aggregates = {
+        "matched": Count("pk", filter=price_q & stock_q),
+        # Имена аннотаций не должны совпадать с полями модели (in_stock)
+        "stock_available": Count("pk", filter=price_q & Q(in_stock__gt=0)),
+        "stock_sold_out": Count("pk", filter=price_q & Q(in_stock__lte=0)),
+    }
+    for index, (low, high) in enumerate(buckets):
+        aggregates[f"price_{index}"] = Count("pk", filter=_price_q(low, high) & stock_q)
+
+    rows = queryset.order_by().values("category__slug", "category__name").annotate(**aggregates)
+
+    categories = []
+    totals = dict.fromkeys(aggregates, 0)
+    for row in rows:
+        for key in totals:
+            totals[key] += row[key]
+        if row["matched"]:
+            categories.append({"slug": row["category__slug"], "name": row["category__name"], "count": row["matched"]})
+    categories.sort(key=lambda category: (-category["count"], category["name"]))
+
+    return {
+        "total": totals["matched"],
+        "categories": categories,
+        "price": [
+            {"min": low, "max": high, "count": totals[f"price_{index}"]}
+            for index, (low, high) in enumerate(buckets)
+        ],
+        "stock": {"in_stock": totals["stock_available"], "out_of_stock": totals["stock_sold_out"]},
+    }
+
+
+def get_facets(filterset):
+    """
+    Returns compute_facets(filterset) from cache. Entries are keyed by the
+    facet version and the normalized filter state, so any product write
+    (see invalidate_facets) makes all of them unreachable at once.
+    """
+    cache = _cache()
+    version = cache.get(FACETS_VERSION_KEY)
+    if version is None:
+        version = _initial_version()
+        if not cache.add(FACETS_VERSION_KEY, version, timeout=None):
+            version = cache.get(FACETS_VERSION_KEY, version)
+    state = sorted((name, str(value)) for name, value in filterset.form.cleaned_data.items() if value not in (None, ""))
+    digest = hashlib.md5(repr(state).encode()).hexdigest()
+    key = f"facets:{version}:{digest}"
+
+    facets = cache.get(key)
+    if facets is None:
+        facets = compute_facets(filterset)
+        cache.set(key, facets, timeout=settings.FACETS_CACHE_TIMEOUT)
+    return facets
@@ -1,6 +1,7 @@
 import django_filters
 
 from apps.shop.models import Product
+from apps.shop.search import search_products
 
 
 class ProductFilter(django_filters.FilterSet):
@@ -8,7 +9,12 @@ class ProductFilter(django_filters.FilterSet):
     min_price = django_filters.NumberFilter(field_name='price_current', lookup_expr='gte')
     in_stock = django_filters.NumberFilter(lookup_expr='gte')
     created_at = django_filters.DateTimeFilter(lookup_expr='gte')
+    q = django_filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Product
-        fields = ['max_price', 'min_price', 'in_stock', 'created_at']
\ No newline at end of file
+        fields = ['max_price', 'min_price', 'in_stock', 'created_at', 'q']
+
+    def filter_search(self, queryset, name, value):
+        # Полнотекстовый поиск (FTS5) с сортировкой по релевантности
+        return search_products(queryset, value)
\ No newline at end of file
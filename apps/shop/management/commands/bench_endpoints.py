@@ -0,0 +1,179 @@
+import json
+import platform
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+import django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.shop.carts import get_cart
+from apps.shop.datasets import SyntheticDataset, parse_scale
+from apps.shop.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the main shop endpoints on a deterministic synthetic dataset in the test database "
+        "and reports p50/p95/p99 latency, throughput and queries per request"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", default="10k", help="10k, 100k, 1m or a number of products")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint")
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--keepdb", action="store_true", help="Keep the test database (and dataset) between runs")
+        parser.add_argument("--output", help="Write results as JSON to this file")
+        parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("--requests must be at least 2")
+        products = parse_scale(options["scale"])
+
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        try:
+            self.prepare_dataset(products, options["seed"])
+            results = self.run_scenarios(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        report = {
+            "meta": {
+                "scale": products,
+                "seed": options["seed"],
+                "requests": options["requests"],
+                "database": connection.vendor,
+                "django": django.get_version(),
+                "python": platform.python_version(),
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+            },
+            "results": results,
+        }
+        self.print_report(results, self.load_baseline(options["compare"]))
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results saved to {options['output']}"))
+
+    def prepare_dataset(self, products, seed):
+        # С --keepdb набор нужного размера переиспользуется
+        if Product._base_manager.count() == products:
+            self.stdout.write(f"Reusing dataset with {products} products")
+            return
+        call_command("flush", interactive=False, verbosity=0)
+        started = time.perf_counter()
+        SyntheticDataset(products, seed=seed, stdout=self.stdout).build()
+        self.stdout.write(f"Dataset built in {time.perf_counter() - started:.1f}s")
+
+    def scenarios(self, rng):
+        """(name, method, prepare) where prepare() returns (path, data) for one request"""
+        in_stock = list(
+            Product.objects.filter(in_stock__gte=50).order_by("id").values_list("slug", flat=True)[:1000]
+        )
+        pages = max(min(Product.objects.count() // 10, 50), 1)
+
+        def products_page():
+            return f"/shop/products/?page={rng.randint(1, pages)}", None
+
+        def products_cursor():
+            return "/shop/products/?cursor=&ordering=-price_current", None
+
+        def cart_get():
+            return "/shop/cart/", None
+
+        def cart_add():
+            return "/shop/cart/", {"slug": rng.choice(in_stock), "quantity": rng.randint(1, 3)}
+
+        def checkout():
+            # Корзина наполняется вне замера
+            cart = get_cart(self.buyer)
+            cart.set_items({product: 1 for product in Product.objects.filter(slug__in=rng.sample(in_stock, 3))})
+            return "/shop/checkout/", {"shipping_id": str(self.shipping.id)}
+
+        def seller_orders():
+            return "/sellers/orders/", None
+
+        return [
+            ("products_page", "get", products_page),
+            ("products_cursor", "get", products_cursor),
+            ("cart_get", "get", cart_get),
+            ("cart_add", "post", cart_add),
+            ("checkout", "post", checkout),
+            ("seller_orders", "get", seller_orders),
+        ]
+
+    def run_scenarios(self, options):
+        rng = random.Random(options["seed"])
+        # Покупатель - первый продавец: корзина и оформление заказа доступны только продавцам (IsSeller)
+        self.buyer = User.objects.filter(account_type="SELLER").order_by("id").first()
+        self.shipping = self.buyer.shipping_addresses.create(
+            full_name="Bench Buyer", email=self.buyer.email, phone="123", address="Street 1",
+            city="City", country="Country", zipcode="123456",
+        )
+        client = APIClient()
+        client.force_authenticate(self.buyer)
+
+        results = []
+        for name, method, prepare in self.scenarios(rng):
+            request = getattr(client, method)
+            for _ in range(options["warmup"]):
+                path, data = prepare()
+                request(path, data)
+            latencies, queries, errors = [], [], 0
+            for _ in range(options["requests"]):
+                path, data = prepare()
+                started = time.perf_counter()
+                response = request(path, data)
+                latencies.append(time.perf_counter() - started)
+                if response.status_code >= 400:
+                    errors += 1
+                if "X-DB-Query-Count" in response:
+                    queries.append(int(response["X-DB-Query-Count"]))
+            results.append(self.summarize(name, method, latencies, queries, errors))
+        self.shipping.delete()
+        return results
+
+    @staticmethod
+    def summarize(name, method, latencies, queries, errors):
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        return {
+            "endpoint": name,
+            "method": method.upper(),
+            "requests": len(latencies),
+            "errors": errors,
+            "p50_ms": round(cuts[49] * 1000, 3),
+            "p95_ms": round(cuts[94] * 1000, 3),
+            "p99_ms": round(cuts[98] * 1000, 3),
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+            "throughput_rps": round(len(latencies) / sum(latencies), 1),
+            "queries_per_request": round(statistics.fmean(queries), 2) if queries else None,
+        }
+
+    @staticmethod
+    def load_baseline(path):
+        if not path:
+            return {}
+        with open(path) as file:
+            return {row["endpoint"]: row for row in json.load(file)["results"]}
+
+    def print_report(self, results, baseline):
+        for row in results:
+            line = (
+                f"{row['endpoint']:<16} p50={row['p50_ms']:8.2f}ms p95={row['p95_ms']:8.2f}ms "
+                f"p99={row['p99_ms']:8.2f}ms {row['throughput_rps']:8.1f} req/s "
+                f"queries={row['queries_per_request']} errors={row['errors']}"
+            )
+            before = baseline.get(row["endpoint"])
+            if before:
+                line += f"  p50 {before['p50_ms'] / row['p50_ms']:4.2f}x vs baseline"
+            self.stdout.write(line)
@@ -0,0 +1,76 @@
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+
+from apps.accounts.models import User
+from apps.profiles.models import Order, OrderItem
+from apps.sellers.models import Seller
+from apps.shop.models import Category, Product
+from apps.shop.serializers import ProductSerializer, OrderItemSerializer, OrderSerializer, CheckItemOrderSerializer
+
+
+def drf_baseline(serializer_class):
+    """Копия сериализатора (и вложенных) со штатным DRF to_representation"""
+    attrs = {"to_representation": serializers.Serializer.to_representation}
+    for name, field in serializer_class._declared_fields.items():
+        if isinstance(field, serializers.BaseSerializer):
+            attrs[name] = drf_baseline(type(field))(*field._args, **field._kwargs)
+    return type(f"Drf{serializer_class.__name__}", (serializer_class,), attrs)
+
+
+class Command(BaseCommand):
+    help = "Compares the fast read-path shop serializers with plain DRF serialization (no DB access)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def build_rows(self, rows):
+        user = User(first_name="Ivan", last_name="Petrov", email="ivan@example.com", avatar="avatars/default.jpg")
+        seller = Seller(user=user, business_name="Shop", slug="shop")
+        category = Category(name="Phones", slug="phones", image="category_images/phones.jpg")
+        products, items, orders = [], [], []
+        for i in range(rows):
+            product = Product(
+                seller=seller, name=f"Product {i}", slug=f"product-{i}", desc="Description " * 5,
+                price_old=Decimal("199.99") if i % 2 else None, price_current=Decimal(i) + Decimal("0.5"),
+                category=category, in_stock=i % 7, image1="product_images/1.jpg", image2="product_images/2.jpg",
+            )
+            item = OrderItem(user=user, product=product, quantity=i % 3 + 1)
+            order = Order(user=user, tx_ref=f"TX{i:010d}", full_name="Ivan Petrov", email="ivan@example.com",
+                          phone="123", address="Street 1", city="City", country="Country", zipcode="123456")
+            # Позиции заказа без обращения к БД
+            order._prefetched_objects_cache = {"orderitems": [item]}
+            products.append(product)
+            items.append(item)
+            orders.append(order)
+        return {"products": products, "items": items, "orders": orders}
+
+    def measure(self, serializer_class, rows, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            data = serializer_class(rows, many=True).data
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, JSONRenderer().render(data)
+
+    def handle(self, *args, **options):
+        data = self.build_rows(options["rows"])
+        cases = [
+            (ProductSerializer, data["products"]),
+            (OrderItemSerializer, data["items"]),
+            (OrderSerializer, data["orders"]),
+            (CheckItemOrderSerializer, data["items"]),
+        ]
+        for serializer_class, rows in cases:
+            drf_time, drf_json = self.measure(drf_baseline(serializer_class), rows, options["repeat"])
+            fast_time, fast_json = self.measure(serializer_class, rows, options["repeat"])
+            identical = "identical" if drf_json == fast_json else "MISMATCH"
+            self.stdout.write(
+                f"{serializer_class.__name__:<26} rows={len(rows)} drf={drf_time * 1000:8.1f}ms "
+                f"fast={fast_time * 1000:8.1f}ms speedup={drf_time / fast_time:4.2f}x json={identical}"
+            )
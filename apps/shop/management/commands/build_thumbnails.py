@@ -0,0 +1,85 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.accounts.models import User
+from apps.common.thumbnails import VARIANT_FORMATS, build_variants, mark_variants_ready, variant_name
+from apps.common.versions import bump_versions
+from apps.shop.models import Category, Product
+
+
+VARIANT_MODELS = (Product, Category, User)
+# Имён в одном UPDATE ... IN при отметке готовых копий
+MARK_BATCH_SIZE = 500
+
+
+def stored_image_names():
+    """Distinct non-empty file names of every model with image variants"""
+    names = set()
+    for model in VARIANT_MODELS:
+        for field in model.variant_fields:
+            names.update(model._base_manager.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True})
+                         .values_list(field, flat=True).distinct().iterator())
+    return sorted(names)
+
+
+def mark_ready(names):
+    """Sets the *_variants_ready flags of every row that shows one of the images"""
+    for start in range(0, len(names), MARK_BATCH_SIZE):
+        batch = names[start:start + MARK_BATCH_SIZE]
+        for model in VARIANT_MODELS:
+            for field in model.variant_fields:
+                mark_variants_ready(model, field, batch)
+
+
+def _build(name):
+    return name, build_variants(name)
+
+
+def has_variants(name):
+    return all(
+        default_storage.exists(variant_name(name, size, file_format))
+        for size in settings.THUMBNAIL_SIZES for file_format in VARIANT_FORMATS
+    )
+
+
+def _close_connections():
+    # Процессам пула БД не нужна, соединение родителя не используем
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Generates WebP/JPEG thumbnail variants for the images already stored in MEDIA_ROOT (in parallel)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+        parser.add_argument("--missing-only", action="store_true", help="Skip images whose variants all exist")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        names = stored_image_names()
+        if options["missing_only"]:
+            names = [name for name in names if not has_variants(name)]
+
+        if options["workers"] > 1 and len(names) > 1:
+            connections.close_all()
+            context = multiprocessing.get_context("fork")
+            with context.Pool(options["workers"], initializer=_close_connections) as pool:
+                results = list(pool.imap_unordered(_build, names, chunksize=16))
+        else:
+            results = [_build(name) for name in names]
+
+        written = [count for _, count in results]
+        if sum(written):
+            mark_ready([name for name, count in results if count])
+            # Закэшированные ответы каталога показывали null вместо новых копий
+            bump_versions("product", "category", "seller")
+        skipped = written.count(0)
+        self.stdout.write(self.style.SUCCESS(
+            f"Built {sum(written)} variants for {len(names) - skipped} images "
+            f"({skipped} missing, unreadable or failed) in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.common.exports import EXPORT_FORMATS, iter_export
+from apps.sellers.models import Seller
+from apps.shop.exports import PRODUCT_EXPORT_COLUMNS, ORDER_ITEM_EXPORT_COLUMNS, product_export_rows, \
+    order_item_export_rows
+
+
+class Command(BaseCommand):
+    help = "Streams products or ordered items to CSV/NDJSON with flat memory usage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("dataset", choices=["products", "orders"])
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--seller", help="Seller slug, limits orders to the seller's products")
+        parser.add_argument("--output", help="File path, defaults to stdout")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        if options["dataset"] == "products":
+            rows, columns = product_export_rows(chunk_size), PRODUCT_EXPORT_COLUMNS
+        else:
+            seller = None
+            if options["seller"]:
+                seller = Seller.objects.get_or_none(slug=options["seller"])
+                if seller is None:
+                    raise CommandError(f"Seller {options['seller']!r} does not exist")
+            rows, columns = order_item_export_rows(seller, chunk_size), ORDER_ITEM_EXPORT_COLUMNS
+
+        output = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            for line in iter_export(rows, columns, options["format"]):
+                output.write(line)
+        finally:
+            if output is not sys.stdout:
+                output.close()
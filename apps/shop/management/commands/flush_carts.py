@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apps.shop.carts import CacheCart
+
+
+class Command(BaseCommand):
+    help = "Writes cache-backed carts that changed since the last flush to OrderItem (run periodically)"
+
+    def handle(self, *args, **options):
+        flushed, evicted = CacheCart.flush()
+        self.stdout.write(self.style.SUCCESS(f"Flushed {flushed} carts ({evicted} evicted before flushing)"))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, FloatField, IntegerField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from apps.common.versions import bump_versions
+from apps.profiles.models import ProductReview
+from apps.shop.models import Product
+
+
+def review_stat(aggregate):
+    """Correlated subquery: one aggregate over the visible reviews of the outer product"""
+    reviews = ProductReview.objects.filter(product=OuterRef("pk")).order_by().values("product")
+    return Coalesce(Subquery(reviews.annotate(value=aggregate).values("value")[:1]), 0, output_field=IntegerField())
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized rating stats of all products from their visible reviews"
+
+    def handle(self, *args, **options):
+        rating_count = review_stat(Count("id"))
+        rating_sum = review_stat(Sum("rating"))
+        with transaction.atomic():
+            # Один UPDATE по всем товарам (в т.ч. скрытым) вместо построчных bulk_update
+            updated = Product._base_manager.update(
+                rating_count=rating_count,
+                rating_sum=rating_sum,
+                avg_rating=Cast(rating_sum, FloatField()) / NullIf(rating_count, 0),
+                **{f"rating_{star}": review_stat(Count("id", filter=Q(rating=star))) for star in range(1, 6)},
+            )
+        bump_versions("product")
+        reviewed = Product._base_manager.filter(rating_count__gt=0).count()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt rating stats for {updated} products ({reviewed} reviewed)"))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.shop.search import fts_enabled, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the FTS5 product search index from visible products"
+
+    def handle(self, *args, **options):
+        if not fts_enabled():
+            raise CommandError("Full-text search index is only used with SQLite")
+        indexed = rebuild_search_index()
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} products"))
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.shop.datasets import DATASET_PASSWORD, SyntheticDataset, parse_scale
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with synthetic users, sellers, categories, products, orders and reviews "
+        "using batched bulk_create (optionally in several processes)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", default="10k", help="10k, 100k, 1m or a number")
+        parser.add_argument("--users", help="Defaults to products / 20")
+        parser.add_argument("--sellers", help="Defaults to users / 10")
+        parser.add_argument("--orders", help="Defaults to products / 2")
+        parser.add_argument("--reviews", help="Defaults to products")
+        parser.add_argument("--review-skew", type=float, default=1.0,
+                            help="Zipf exponent of reviews per product, 0 - uniform")
+        parser.add_argument("--order-skew", type=float, default=0.8,
+                            help="Zipf exponent of orders per user, 0 - uniform")
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=1, help="Processes building chunks in parallel")
+        parser.add_argument("--flush", action="store_true", help="Delete all data before seeding")
+
+    def handle(self, *args, **options):
+        counts = {
+            name: parse_scale(options[name]) if options[name] is not None else None
+            for name in ("products", "users", "sellers", "orders", "reviews")
+        }
+        if counts["products"] < 1 or counts["users"] is not None and counts["users"] < 1:
+            raise CommandError("At least one product and one user are required")
+        if options["flush"]:
+            call_command("flush", interactive=False, verbosity=0)
+
+        started = time.perf_counter()
+        dataset = SyntheticDataset(
+            seed=options["seed"], batch_size=options["batch_size"], workers=options["workers"],
+            review_skew=options["review_skew"], order_skew=options["order_skew"], stdout=self.stdout, **counts,
+        )
+        dataset.build()
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded in {time.perf_counter() - started:.1f}s, every user's password is {DATASET_PASSWORD!r}"
+        ))
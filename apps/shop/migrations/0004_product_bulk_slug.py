@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 05:50
+
+import apps.common.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0003_product_rating_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='product',
+            name='slug',
+            field=apps.common.fields.BulkAutoSlugField(editable=False, populate_from='name', unique=True),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-18 06:00
+
+from django.db import migrations
+
+# Исходная схема индекса (связь по rowid), заменена в 0008_search_index_product_id
+CREATE_SEARCH_INDEX_SQL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS shop_product_fts USING fts5(
+        name, "desc", tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS shop_product_fts_insert AFTER INSERT ON shop_product
+        WHEN new.is_deleted = 0
+    BEGIN
+        INSERT INTO shop_product_fts(rowid, name, "desc") VALUES (new.rowid, new.name, new."desc");
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS shop_product_fts_update AFTER UPDATE OF name, "desc", is_deleted ON shop_product
+        WHEN old.name IS NOT new.name OR old."desc" IS NOT new."desc" OR old.is_deleted IS NOT new.is_deleted
+    BEGIN
+        DELETE FROM shop_product_fts WHERE rowid = old.rowid;
+        INSERT INTO shop_product_fts(rowid, name, "desc") SELECT new.rowid, new.name, new."desc" WHERE new.is_deleted = 0;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS shop_product_fts_delete AFTER DELETE ON shop_product
+    BEGIN
+        DELETE FROM shop_product_fts WHERE rowid = old.rowid;
+    END""",
+]
+
+DROP_SEARCH_INDEX_SQL = [
+    "DROP TRIGGER IF EXISTS shop_product_fts_insert",
+    "DROP TRIGGER IF EXISTS shop_product_fts_update",
+    "DROP TRIGGER IF EXISTS shop_product_fts_delete",
+    "DROP TABLE IF EXISTS shop_product_fts",
+]
+
+
+def fts_enabled(connection):
+    return connection.vendor == "sqlite"
+
+
+def run_statements(statements, fill=False):
+    def run(apps, schema_editor):
+        if not fts_enabled(schema_editor.connection):
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+        if fill:
+            schema_editor.execute(
+                'INSERT INTO shop_product_fts(rowid, name, "desc") '
+                'SELECT rowid, name, "desc" FROM shop_product WHERE is_deleted = 0'
+            )
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0004_product_bulk_slug'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements(CREATE_SEARCH_INDEX_SQL, fill=True),
+            run_statements(DROP_SEARCH_INDEX_SQL),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 05:58
+
+import apps.common.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0006_product_indexes'),
+    ]
+
+    operations = [
+        # default - только атрибут Python, схема БД не меняется;
+        # без SeparateDatabaseAndState SQLite пересоздал бы таблицы целиком
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='category',
+                    name='id',
+                    field=models.UUIDField(default=apps.common.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+                migrations.AlterField(
+                    model_name='product',
+                    name='id',
+                    field=models.UUIDField(default=apps.common.utils.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 6.0 on 2026-10-18 06:50
+
+from django.db import migrations
+
+from apps.shop.search import CREATE_SEARCH_INDEX_SQL, DROP_SEARCH_INDEX_SQL, FILL_SEARCH_INDEX_SQL, fts_enabled
+
+# Схема 0005 (связь по rowid) для отката
+LEGACY_CREATE_SQL = [
+    'CREATE VIRTUAL TABLE shop_product_fts USING fts5('
+    'name, "desc", tokenize = \'unicode61 remove_diacritics 2\', prefix = \'2 3\')',
+    'INSERT INTO shop_product_fts(rowid, name, "desc") SELECT rowid, name, "desc" FROM shop_product WHERE is_deleted = 0',
+    """CREATE TRIGGER shop_product_fts_insert AFTER INSERT ON shop_product
+        WHEN new.is_deleted = 0
+    BEGIN
+        INSERT INTO shop_product_fts(rowid, name, "desc") VALUES (new.rowid, new.name, new."desc");
+    END""",
+    """CREATE TRIGGER shop_product_fts_update AFTER UPDATE OF name, "desc", is_deleted ON shop_product
+        WHEN old.name IS NOT new.name OR old."desc" IS NOT new."desc" OR old.is_deleted IS NOT new.is_deleted
+    BEGIN
+        DELETE FROM shop_product_fts WHERE rowid = old.rowid;
+        INSERT INTO shop_product_fts(rowid, name, "desc") SELECT new.rowid, new.name, new."desc" WHERE new.is_deleted = 0;
+    END""",
+    """CREATE TRIGGER shop_product_fts_delete AFTER DELETE ON shop_product
+    BEGIN
+        DELETE FROM shop_product_fts WHERE rowid = old.rowid;
+    END""",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        if not fts_enabled(schema_editor.connection):
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shop', '0007_uuid7_primary_keys'),
+        # Индекс заполняется уже переписанными ключами товаров
+        ('profiles', '0006_rekey_uuid7'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements([*DROP_SEARCH_INDEX_SQL, *CREATE_SEARCH_INDEX_SQL, FILL_SEARCH_INDEX_SQL]),
+            run_statements([*DROP_SEARCH_INDEX_SQL, *LEGACY_CREATE_SQL]),
+        ),
+    ]
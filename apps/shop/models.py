@@ -1,12 +1,26 @@
 from autoslug import AutoSlugField
 from django.db import models
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast, NullIf
 
 
+from apps.common.fields import BulkAutoSlugField
 from apps.common.models import BaseModel, IsDeletedModel
+from apps.common.thumbnails import ImageVariantsMixin
+from apps.common.versions import bump_versions
+from apps.shop.facets import invalidate_facets
 from apps.sellers.models import Seller
 
 
-class Category(BaseModel):
+def catalog_scopes(category_ids=(), seller_ids=()):
+    """Version scopes of product listings: all products plus the touched categories and sellers"""
+    scopes = ["product"]
+    scopes += [f"category:{category_id}" for category_id in set(category_ids) if category_id is not None]
+    scopes += [f"seller:{seller_id}" for seller_id in set(seller_ids) if seller_id is not None]
+    return scopes
+
+
+class Category(ImageVariantsMixin, BaseModel):
     """
     Represents a product category.
 
@@ -14,6 +28,7 @@ class Category(BaseModel):
         name (str): The category name, unique for each instance.
         slug (str): The slug generated from the name, used in URLs.
         image (ImageField): An image representing the category.
+        image_variants_ready (bool): Whether the thumbnail variants of the image are built.
 
     Methods:
         __str__():
@@ -23,15 +38,32 @@ class Category(BaseModel):
     name = models.CharField(max_length=100, unique=True)
     slug = AutoSlugField(populate_from="name", unique=True, always_update=True)
     image = models.ImageField(upload_to='category_images/')
+    image_variants_ready = models.BooleanField(default=False, editable=False)
+
+    variant_fields = ("image",)
 
     def __str__(self):
         return self.name
 
+    def variant_scopes(self):
+        return ["category", f"category:{self.pk}"]
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate_facets()
+        bump_versions("category", f"category:{self.pk}")
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_facets()
+        bump_versions("category", f"category:{self.pk}")
+        return result
+
     class Meta:
         verbose_name_plural = "Categories"
 
 
-class Product(IsDeletedModel):
+class Product(ImageVariantsMixin, IsDeletedModel):
     """
     Represents a product listed for sale.
 
@@ -47,11 +79,24 @@ class Product(IsDeletedModel):
         image1 (ImageField): The first image of the product.
         image2 (ImageField): The second image of the product.
         image3 (ImageField): The third image of the product.
+        image1_variants_ready .. image3_variants_ready (bool): Whether the thumbnail variants are built.
+        rating_count (int): The number of visible reviews of the product.
+        rating_sum (int): The sum of ratings of visible reviews.
+        avg_rating (float): The average rating, None while there are no reviews.
+        rating_1 .. rating_5 (int): The star histogram of visible reviews.
+
+    Methods:
+        take_from_stock(product_id, quantity, category_id=None, seller_id=None):
+            Atomically decrements in_stock, refusing to go below zero.
+        update_rating_stats(product_id, remove=None, add=None):
+            Incrementally moves one review rating in or out of the stored rating stats.
+        remove_rating_stats(product_id, ratings):
+            Moves the ratings of bulk-deleted reviews out of the stored rating stats.
     """
 
     seller = models.ForeignKey(Seller, on_delete=models.SET_NULL, related_name="products", null=True)
     name = models.CharField(max_length=100)
-    slug = AutoSlugField(populate_from="name", unique=True, db_index=True)
+    slug = BulkAutoSlugField(populate_from="name", unique=True, db_index=True)
     desc = models.TextField()
     price_old = models.DecimalField(max_digits=10, decimal_places=2, null=True)
     price_current = models.DecimalField(max_digits=10, decimal_places=2)
@@ -62,7 +107,141 @@ class Product(IsDeletedModel):
     image1 = models.ImageField(upload_to='product_images/', default='avatars/default.jpg')
     image2 = models.ImageField(upload_to='product_images/', blank=True)
     image3 = models.ImageField(upload_to='product_images/', blank=True)
-
+    # Уменьшенные копии (WebP/JPEG) строятся в фоне после сохранения, см. apps.common.thumbnails;
+    # флаги *_variants_ready ставятся, когда копии картинки записаны
+    variant_fields = ("image1", "image2", "image3")
+    image1_variants_ready = models.BooleanField(default=False, editable=False)
+    image2_variants_ready = models.BooleanField(default=False, editable=False)
+    image3_variants_ready = models.BooleanField(default=False, editable=False)
+
+    # Denormalized rating stats, maintained by ProductReview.save/hard_delete
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(null=True, blank=True)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    class Meta(IsDeletedModel.Meta):
+        # Частичные индексы WHERE NOT is_deleted: IsDeletedManager всегда добавляет is_deleted=False,
+        # а SQLite не использует булево условие как равенство по колонке составного индекса.
+        # Хвост (created_at, id) совпадает с сортировкой курсорной пагинации.
+        indexes = [
+            models.Index(fields=["created_at", "id"], condition=Q(is_deleted=False), name="shop_product_visible_idx"),
+            models.Index(
+                fields=["category", "created_at", "id"], condition=Q(is_deleted=False), name="shop_product_category_idx"
+            ),
+            models.Index(
+                fields=["seller", "created_at", "id"], condition=Q(is_deleted=False), name="shop_product_seller_idx"
+            ),
+            models.Index(fields=["price_current", "id"], condition=Q(is_deleted=False), name="shop_product_price_idx"),
+        ]
 
     def __str__(self):
-        return self.name
\ No newline at end of file
+        return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Запоминаем категорию и продавца: при переносе сбрасываются и старые списки
+        instance._stored_listing = (instance.__dict__.get("category_id"), instance.__dict__.get("seller_id"))
+        return instance
+
+    def _listing_scopes(self):
+        stored_category, stored_seller = getattr(self, "_stored_listing", (None, None))
+        return catalog_scopes([stored_category, self.category_id], [stored_seller, self.seller_id])
+
+    def variant_scopes(self):
+        return catalog_scopes([self.category_id], [self.seller_id])
+
+    def save(self, *args, **kwargs):
+        # Мягкое удаление тоже проходит через save
+        super().save(*args, **kwargs)
+        invalidate_facets()
+        bump_versions(*self._listing_scopes())
+        self._stored_listing = (self.category_id, self.seller_id)
+
+    def hard_delete(self, *args, **kwargs):
+        scopes = self._listing_scopes()
+        super().hard_delete(*args, **kwargs)
+        invalidate_facets()
+        bump_versions(*scopes)
+
+    @classmethod
+    def take_from_stock(cls, product_id, quantity, category_id=None, seller_id=None):
+        """
+        Atomically decrements in_stock if enough units are left.
+
+        category_id / seller_id of the product select the listings to
+        invalidate; when omitted they are read with one more query.
+
+        Returns:
+            bool: False if the product is missing or would go below zero.
+        """
+        taken = cls.objects.filter(pk=product_id, in_stock__gte=quantity).update(
+            in_stock=F("in_stock") - quantity
+        ) == 1
+        if taken:
+            if category_id is None:
+                category_id, seller_id = cls._base_manager.filter(pk=product_id).values_list(
+                    "category_id", "seller_id"
+                ).get()
+            invalidate_facets()
+            bump_versions(*catalog_scopes([category_id], [seller_id]))
+        return taken
+
+    @property
+    def rating_histogram(self):
+        return {str(star): getattr(self, f"rating_{star}") for star in range(1, 6)}
+
+    @classmethod
+    def update_rating_stats(cls, product_id, remove=None, add=None):
+        """
+        Applies a single review change to the stored stats with one UPDATE.
+
+        Args:
+            product_id: The product whose stats should change.
+            remove (int | None): The rating leaving the stats (deleted/hidden/changed review).
+            add (int | None): The rating entering the stats (new/restored/changed review).
+        """
+        if remove == add:
+            return
+        count_delta = (add is not None) - (remove is not None)
+        sum_delta = (add or 0) - (remove or 0)
+        updates = {}
+        if remove is not None:
+            updates[f"rating_{remove}"] = F(f"rating_{remove}") - 1
+        if add is not None:
+            updates[f"rating_{add}"] = F(f"rating_{add}") + 1
+        if count_delta or sum_delta:
+            new_count = F("rating_count") + count_delta
+            new_sum = F("rating_sum") + sum_delta
+            updates["rating_count"] = new_count
+            updates["rating_sum"] = new_sum
+            updates["avg_rating"] = Cast(new_sum, FloatField()) / NullIf(new_count, 0)
+        # _base_manager: stats of soft-deleted products are kept up to date as well
+        cls._base_manager.filter(pk=product_id).update(**updates)
+        bump_versions("product")
+
+    @classmethod
+    def remove_rating_stats(cls, product_id, ratings):
+        """
+        Moves many ratings out of the stored stats with one UPDATE (bulk review deletes).
+
+        Args:
+            product_id: The product whose stats should change.
+            ratings (dict): {rating: number of removed visible reviews}.
+        """
+        ratings = {rating: count for rating, count in ratings.items() if count}
+        if not ratings:
+            return
+        new_count = F("rating_count") - sum(ratings.values())
+        new_sum = F("rating_sum") - sum(rating * count for rating, count in ratings.items())
+        updates = {f"rating_{rating}": F(f"rating_{rating}") - count for rating, count in ratings.items()}
+        updates.update(
+            rating_count=new_count, rating_sum=new_sum, avg_rating=Cast(new_sum, FloatField()) / NullIf(new_count, 0)
+        )
+        cls._base_manager.filter(pk=product_id).update(**updates)
+        bump_versions("product")
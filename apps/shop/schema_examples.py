@@ -8,10 +8,21 @@ from apps.profiles.serializers import ShippingAddressSerializer
 
 @extend_schema_field(ShippingAddressSerializer)
 def get_shipping_detail(self, obj):
-    return ShippingAddressSerializer(obj).data
+    # Один экземпляр сериализатора на весь список заказов вместо нового на каждую строку
+    shipping_serializer = getattr(self, "_shipping_serializer", None)
+    if shipping_serializer is None:
+        shipping_serializer = self._shipping_serializer = ShippingAddressSerializer()
+    return shipping_serializer.to_representation(obj)
 
 
 PRODUCT_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="q",
+        description="Full-text search in product name and description, words match by prefix. "
+                    "Results are ordered by relevance (except in cursor mode)",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
     OpenApiParameter(
         name="max_price",
         description="Filter products by MAX current price",
@@ -48,4 +59,28 @@ PRODUCT_PARAM_EXAMPLE = [
         required=False,
         type=OpenApiTypes.INT,
     ),
+    OpenApiParameter(
+        name="cursor",
+        description="Keyset pagination mode: pass an empty value for the first page, "
+                    "then the opaque cursor from the next/previous links. Ignores 'page'",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+    OpenApiParameter(
+        name="ordering",
+        description="Ordering in cursor mode: -created_at (default), created_at, -id (newest first), id, price_current, -price_current",
+        required=False,
+        type=OpenApiTypes.STR,
+    ),
+]
+
+
+EXPORT_PARAM_EXAMPLE = [
+    OpenApiParameter(
+        name="export_format",
+        description="Export file format: csv (default) or ndjson",
+        required=False,
+        type=OpenApiTypes.STR,
+        enum=["csv", "ndjson"],
+    ),
 ]
\ No newline at end of file
@@ -0,0 +1,103 @@
+import re
+
+from django.db import connection, connections
+from django.db.migrations.recorder import MigrationRecorder
+from django.db.models import Q
+
+FTS_TABLE = "shop_product_fts"
+SEARCH_INDEX_MIGRATION = ("shop", "0008_search_index_product_id")
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# Отдельная FTS5-таблица с копией name/desc и id товара (UNINDEXED - не участвует
+# в поиске). Связь идёт по id, а не по rowid: rowid таблицы с UUID-ключом не стабилен
+# (VACUUM может его перенумеровать). Триггеры держат индекс в синхронизации при любых
+# записях (save, bulk_create, update, мягкое и жёсткое удаление); скрытые товары в индекс
+# не попадают. Пересоздание shop_product (AlterField в SQLite) удаляет триггеры,
+# поэтому они создаются заново после каждого migrate (ShopConfig.ready).
+CREATE_SEARCH_INDEX_SQL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        product_id UNINDEXED, name, "desc", tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS shop_product_fts_insert AFTER INSERT ON shop_product
+        WHEN new.is_deleted = 0
+    BEGIN
+        INSERT INTO {FTS_TABLE}(product_id, name, "desc") VALUES (new.id, new.name, new."desc");
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS shop_product_fts_update AFTER UPDATE OF id, name, "desc", is_deleted ON shop_product
+        WHEN old.id IS NOT new.id OR old.name IS NOT new.name OR old."desc" IS NOT new."desc"
+            OR old.is_deleted IS NOT new.is_deleted
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE product_id = old.id;
+        INSERT INTO {FTS_TABLE}(product_id, name, "desc") SELECT new.id, new.name, new."desc" WHERE new.is_deleted = 0;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS shop_product_fts_delete AFTER DELETE ON shop_product
+    BEGIN
+        DELETE FROM {FTS_TABLE} WHERE product_id = old.id;
+    END""",
+]
+
+FILL_SEARCH_INDEX_SQL = (
+    f'INSERT INTO {FTS_TABLE}(product_id, name, "desc") SELECT id, name, "desc" FROM shop_product WHERE is_deleted = 0'
+)
+
+DROP_SEARCH_INDEX_SQL = [
+    "DROP TRIGGER IF EXISTS shop_product_fts_insert",
+    "DROP TRIGGER IF EXISTS shop_product_fts_update",
+    "DROP TRIGGER IF EXISTS shop_product_fts_delete",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def fts_enabled(using_connection=connection):
+    return using_connection.vendor == "sqlite"
+
+
+def build_match_query(text):
+    """
+    Turns user input into an FTS5 query: every word becomes a quoted
+    prefix term ("phon"* matches phone/phones), terms are AND-ed.
+    """
+    return " ".join(f'"{word}"*' for word in WORD_RE.findall(text))
+
+
+def search_products(queryset, text):
+    """
+    Filters a Product queryset by a full-text query and orders it by
+    relevance (bm25, best first). Falls back to icontains off SQLite.
+    """
+    match_query = build_match_query(text)
+    if not match_query:
+        return queryset
+    if not fts_enabled():
+        return queryset.filter(Q(name__icontains=text) | Q(desc__icontains=text))
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.product_id = shop_product.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match_query],
+        select={"search_rank": f"{FTS_TABLE}.rank"},
+    ).order_by("search_rank")
+
+
+def rebuild_search_index():
+    """Re-fills the search index from visible products; returns the number of indexed rows."""
+    with connection.cursor() as cursor:
+        for statement in CREATE_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.execute(FILL_SEARCH_INDEX_SQL)
+        indexed = cursor.rowcount
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def ensure_search_index(using="default", **kwargs):
+    """post_migrate: recreates the index triggers if a rebuild of shop_product dropped them"""
+    using_connection = connections[using]
+    if not fts_enabled(using_connection):
+        return
+    # Только при текущей схеме индекса (в т.ч. не после отката миграций shop)
+    if SEARCH_INDEX_MIGRATION not in MigrationRecorder(using_connection).applied_migrations():
+        return
+    with using_connection.cursor() as cursor:
+        for statement in CREATE_SEARCH_INDEX_SQL:
+            cursor.execute(statement)
@@ -1,22 +1,27 @@
+import posixpath
+
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_field
 
+from apps.common.serializers import FastRepresentationMixin, ImageVariantsField
 
 
 
-class CategorySerializer(serializers.Serializer):
+class CategorySerializer(FastRepresentationMixin, serializers.Serializer):
     name = serializers.CharField()
     slug = serializers.SlugField(read_only=True)
     image = serializers.ImageField()
+    image_variants = ImageVariantsField(source="image")
 
 
-class SellerShopSerializer(serializers.Serializer):
+class SellerShopSerializer(FastRepresentationMixin, serializers.Serializer):
     name = serializers.CharField(source="business_name")
     slug = serializers.SlugField()
     avatar = serializers.CharField(source="user.avatar")
+    avatar_variants = ImageVariantsField(source="user.avatar")
 
 
-class ProductSerializer(serializers.Serializer):
+class ProductSerializer(FastRepresentationMixin, serializers.Serializer):
     seller = SellerShopSerializer()
     name = serializers.CharField()
     slug = serializers.SlugField()
@@ -28,6 +33,9 @@ class ProductSerializer(serializers.Serializer):
     image1 = serializers.ImageField()
     image2 = serializers.ImageField(required=False)
     image3 = serializers.ImageField(required=False)
+    image1_variants = ImageVariantsField(source="image1")
+    image2_variants = ImageVariantsField(source="image2")
+    image3_variants = ImageVariantsField(source="image3")
 
 
 class CreateProductSerializer(serializers.Serializer):
@@ -41,7 +49,27 @@ class CreateProductSerializer(serializers.Serializer):
     image3 = serializers.ImageField(required=False)
 
 
-class OrderItemProductSerializer(serializers.Serializer):
+class ImportProductSerializer(CreateProductSerializer):
+    """
+    Строка массового импорта: картинки задаются путями внутри MEDIA_ROOT,
+    только в папке продавца из context["seller"] (Seller.media_prefix)
+    """
+    image1 = serializers.CharField(max_length=100, required=False)
+    image2 = serializers.CharField(max_length=100, required=False)
+    image3 = serializers.CharField(max_length=100, required=False)
+
+    def validate_image_path(self, value):
+        prefix = self.context["seller"].media_prefix
+        name = posixpath.normpath(value)
+        # normpath схлопывает "a/../b", поэтому проверяем и исходные сегменты
+        if ".." in value.split("/") or "\\" in value or not name.startswith(prefix):
+            raise serializers.ValidationError(f"Image must be a path inside {prefix}")
+        return name
+
+    validate_image1 = validate_image2 = validate_image3 = validate_image_path
+
+
+class OrderItemProductSerializer(FastRepresentationMixin, serializers.Serializer):
     seller = SellerShopSerializer()
     name = serializers.CharField()
     slug = serializers.SlugField()
@@ -50,7 +78,7 @@ class OrderItemProductSerializer(serializers.Serializer):
     )
 
 
-class OrderItemSerializer(serializers.Serializer):
+class OrderItemSerializer(FastRepresentationMixin, serializers.Serializer):
     product = OrderItemProductSerializer()
     quantity = serializers.IntegerField()
     total = serializers.DecimalField(max_digits=10, decimal_places=2, source="get_total")
@@ -65,7 +93,7 @@ class CheckoutSerializer(serializers.Serializer):
     shipping_id = serializers.UUIDField()
 
 
-class OrderSerializer(serializers.Serializer):
+class OrderSerializer(FastRepresentationMixin, serializers.Serializer):
     tx_ref = serializers.CharField()
     first_name = serializers.CharField(source="user.first_name")
     last_name = serializers.CharField(source="user.last_name")
@@ -82,15 +110,17 @@ class OrderSerializer(serializers.Serializer):
     )
 
     def get_shipping_details(self, obj):
-        from schema_examples import get_shipping_detail
+        from apps.shop.schema_examples import get_shipping_detail
         return get_shipping_detail(self, obj)
 
 
-class CheckItemOrderSerializer(serializers.Serializer):
+class CheckItemOrderSerializer(FastRepresentationMixin, serializers.Serializer):
     product = ProductSerializer()
     quantity = serializers.IntegerField()
     total = serializers.FloatField(source="get_total")
 
 
 class CheckProductRating(ProductSerializer):
-    avg_rating = serializers.FloatField()
\ No newline at end of file
+    avg_rating = serializers.FloatField()
+    rating_count = serializers.IntegerField()
+    rating_histogram = serializers.DictField(child=serializers.IntegerField())
\ No newline at end of file
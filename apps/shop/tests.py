@@ -1,3 +1,698 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import unittest
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import OutputWrapper
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from apps.accounts.models import User
+from apps.profiles.models import Order, OrderItem, ProductReview, ShippingAddress
+from apps.sellers.models import Seller
+from apps.shop.management.commands.bench_endpoints import Command as BenchEndpointsCommand
+from apps.shop.management.commands.bench_serializers import Command as BenchSerializersCommand, drf_baseline
+from apps.shop.models import Category, Product
+from apps.shop.search import DROP_SEARCH_INDEX_SQL, FTS_TABLE, ensure_search_index, search_products
+from apps.shop.serializers import (
+    CategorySerializer, CheckItemOrderSerializer, OrderItemSerializer, OrderSerializer, ProductSerializer,
+)
+from apps.shop.views import CART_BULK_MAX_ITEMS
+
+
+def create_buyer(index):
+    user = User.objects.create_user("Buyer", "User", f"buyer{index}@example.com", "pass", account_type="SELLER")
+    Seller.objects.create(user=user, business_name=f"Buyer {index}", is_approved=True)
+    shipping = ShippingAddress.objects.create(
+        user=user, full_name="Buyer User", email=user.email, phone="123", address="Street 1",
+        city="City", country="Country", zipcode="123456",
+    )
+    return user, shipping
+
+
+class QueryPlanAssertions:
+    """EXPLAIN-проверки: индекс должен реально выбираться планировщиком"""
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, msg=plan)
+        self.assertNotIn("TEMP B-TREE", plan, msg=plan)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "Query plans are checked against SQLite")
+class ProductIndexTests(QueryPlanAssertions, TestCase):
+    def setUp(self):
+        user, _ = create_buyer(0)
+        self.seller = user.seller
+        self.category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=self.category, seller=self.seller)
+
+    def test_catalog_cursor_page(self):
+        self.assertUsesIndex(Product.objects.order_by("-created_at", "-id")[:20], "shop_product_visible_idx")
+
+    def test_category_listing(self):
+        queryset = Product.objects.filter(category=self.category).order_by("-created_at", "-id")[:20]
+        self.assertUsesIndex(queryset, "shop_product_category_idx")
+
+    def test_seller_listing(self):
+        queryset = Product.objects.filter(seller=self.seller).order_by("-created_at", "-id")[:20]
+        self.assertUsesIndex(queryset, "shop_product_seller_idx")
+
+    def test_price_ordering(self):
+        self.assertUsesIndex(Product.objects.order_by("price_current", "id")[:20], "shop_product_price_idx")
+
+    def test_price_range_filter(self):
+        queryset = Product.objects.filter(price_current__gte=5, price_current__lte=100).order_by("price_current", "id")
+        self.assertUsesIndex(queryset, "shop_product_price_idx")
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ConditionalCatalogTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, _ = create_buyer(0)
+        self.category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.product = Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=self.category)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_not_modified_without_queries(self):
+        for path in ("/shop/categories/", "/shop/products/", f"/shop/products/{self.product.slug}/"):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            with self.assertNumQueries(0):
+                response = self.client.get(path, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304)
+
+    def test_validators_change_on_write(self):
+        response = self.client.get("/shop/products/")
+        etag, last_modified = response["ETag"], response["Last-Modified"]
+        self.assertEqual(self.client.get("/shop/products/", HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        self.assertNotEqual(self.client.get("/shop/products/?ordering=price_current")["ETag"], etag)
+
+        self.product.price_current = "12.00"
+        self.product.save()
+        response = self.client.get("/shop/products/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = self.client.get("/shop/categories/")["ETag"]
+        self.product.delete()
+        self.assertEqual(self.client.get("/shop/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.category.name = "Smartphones"
+        self.category.save()
+        self.assertEqual(self.client.get("/shop/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ListingPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, _ = create_buyer(0)
+        self.seller = self.user.seller
+        self.phones = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        laptops = Category.objects.create(name="Laptops", image="category_images/laptops.jpg")
+        # Одинаковые цены: порядок страниц держится на тай-брейкере id
+        for index in range(7):
+            Product.objects.create(
+                name=f"Phone {index}", desc="desc", price_current="10.00" if index % 2 else "5.00",
+                category=self.phones, seller=self.seller,
+            )
+        Product.objects.create(name="Laptop", desc="desc", price_current="20.00", category=laptops)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        pages = []
+        while url:
+            data = self.client.get(url).data
+            pages.append(data)
+            url = data["next"]
+        return pages
+
+    def slugs(self, pages):
+        return [product["slug"] for page in pages for product in page["results"]]
+
+    def test_page_size_and_next_link(self):
+        for path in ("/shop/categories/phones/", f"/shop/sellers/{self.seller.slug}/"):
+            with self.subTest(path):
+                first = self.client.get(path).data
+                self.assertEqual((first["count"], len(first["results"])), (7, 4))  # PAGE_SIZE
+                first = self.client.get(path, {"page_size": 3}).data
+                self.assertEqual(len(first["results"]), 3)
+                self.assertIn("page=2", first["next"])
+                self.assertIsNone(first["previous"])
+
+    def test_pages_keep_a_stable_order(self):
+        expected = list(Product.objects.filter(category=self.phones).values_list("slug", flat=True))
+        by_price = list(
+            Product.objects.filter(category=self.phones).order_by("price_current", "id").values_list("slug", flat=True)
+        )
+        for path in ("/shop/categories/phones/", f"/shop/sellers/{self.seller.slug}/"):
+            with self.subTest(path):
+                pages = self.walk(f"{path}?page_size=3")
+                self.assertEqual([len(page["results"]) for page in pages], [3, 3, 1])
+                self.assertEqual(self.slugs(pages), expected)
+                pages = self.walk(f"{path}?cursor=&ordering=price_current&page_size=3")
+                self.assertEqual(self.slugs(pages), by_price)
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ListingResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user, _ = create_buyer(0)
+        self.phones = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.laptops = Category.objects.create(name="Laptops", image="category_images/laptops.jpg")
+        self.phone = Product.objects.create(
+            name="Phone", desc="desc", price_current="10.00", category=self.phones, seller=self.user.seller
+        )
+        self.laptop = Product.objects.create(name="Laptop", desc="desc", price_current="20.00", category=self.laptops)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def names(self, path):
+        return [product["name"] for product in self.client.get(path).data["results"]]
+
+    def test_listing_is_served_from_cache(self):
+        self.assertEqual(self.names("/shop/products/?page=1&page_size=10"), ["Laptop", "Phone"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("/shop/products/?page_size=10&page=1&q="), ["Laptop", "Phone"])
+        self.assertEqual(self.names("/shop/categories/phones/"), ["Phone"])
+        # Остаётся только поиск категории по slug
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names("/shop/categories/phones/"), ["Phone"])
+
+    def test_blank_cursor_is_not_the_page_listing(self):
+        # Пустой ?cursor= выбирает курсорную пагинацию (без count), в любом порядке запросов
+        for paths in (["/shop/products/", "/shop/products/?cursor="], ["/shop/products/?cursor=", "/shop/products/"]):
+            cache.clear()
+            first, second = (self.client.get(path).data for path in paths)
+            self.assertNotEqual("count" in first, "count" in second)
+            self.assertEqual(first["results"], second["results"])
+
+    def test_write_invalidates_only_touched_listings(self):
+        self.names("/shop/categories/phones/")
+        self.names("/shop/categories/laptops/")
+        self.names(f"/shop/sellers/{self.user.seller.slug}/")
+
+        self.laptop.price_current = "25.00"
+        self.laptop.save()
+        with self.assertNumQueries(1):
+            self.names("/shop/categories/phones/")
+        with self.assertNumQueries(1):
+            self.names(f"/shop/sellers/{self.user.seller.slug}/")
+
+        # Перенос в другую категорию сбрасывает обе
+        self.phone.category = self.laptops
+        self.phone.save()
+        self.assertEqual(self.names("/shop/categories/phones/"), [])
+        self.assertEqual(self.names("/shop/categories/laptops/"), ["Laptop", "Phone"])
+
+        # Мягкое удаление
+        self.phone.delete()
+        self.assertEqual(self.names("/shop/categories/laptops/"), ["Laptop"])
+        self.assertEqual(self.names(f"/shop/sellers/{self.user.seller.slug}/"), [])
+
+
+def png_bytes(width, height):
+    buffer = BytesIO()
+    Image.new("RGBA", (width, height), (200, 30, 30, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+class ThumbnailTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.media_root = media.name
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, THUMBNAIL_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_variants_built_after_upload(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(
+                name="Phones", image=SimpleUploadedFile("phones.png", png_bytes(1200, 600), content_type="image/png")
+            )
+            # До постройки копий отдаётся null
+            self.assertIsNone(CategorySerializer(category).data["image_variants"])
+        for size, box in (("small", (160, 160)), ("medium", (480, 480))):
+            for extension in ("webp", "jpg"):
+                path = os.path.join(self.media_root, "thumbs", "category_images", f"phones.png.{size}.{extension}")
+                with Image.open(path) as variant:
+                    self.assertEqual(variant.size, (box[0], box[0] // 2))
+
+        category.refresh_from_db()
+        self.assertTrue(category.image_variants_ready)
+        # Готовность читается из строки, хранилище при сериализации не опрашивается
+        with mock.patch("django.core.files.storage.default_storage.exists", side_effect=AssertionError):
+            variants = CategorySerializer(category).data["image_variants"]
+        self.assertEqual(variants["small"]["webp"], "/media/thumbs/category_images/phones.png.small.webp")
+        self.assertEqual(variants["medium"]["jpeg"], "/media/thumbs/category_images/phones.png.medium.jpg")
+
+    def test_uploads_with_variant_like_names_are_kept(self):
+        os.makedirs(os.path.join(self.media_root, "category_images"))
+        # Одно имя в двух форматах и загрузка, чьё имя похоже на имя копии
+        sizes = {"phones.png": (640, 320), "phones.jpg": (320, 640), "phones.small.jpg": (64, 64)}
+        for name, (width, height) in sizes.items():
+            with open(os.path.join(self.media_root, "category_images", name), "wb") as file:
+                file.write(png_bytes(width, height))
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Phones", image="category_images/phones.png")
+            Category.objects.create(name="Phones JPEG", image="category_images/phones.jpg")
+
+        with Image.open(os.path.join(self.media_root, "category_images", "phones.small.jpg")) as upload:
+            self.assertEqual(upload.size, (64, 64))
+        for name, size in (("phones.png.small.webp", (160, 80)), ("phones.jpg.small.webp", (80, 160))):
+            with Image.open(os.path.join(self.media_root, "thumbs", "category_images", name)) as variant:
+                self.assertEqual(variant.size, size)
+
+    def test_backfill_command(self):
+        os.makedirs(os.path.join(self.media_root, "avatars"))
+        with open(os.path.join(self.media_root, "avatars", "default.jpg"), "wb") as file:
+            file.write(png_bytes(64, 64))
+        user = User.objects.create_user("Buyer", "User", "buyer@example.com", "pass")
+        User.objects.filter(pk=user.pk).update(avatar_variants_ready=False)
+
+        out = StringIO()
+        call_command("build_thumbnails", workers=1, stdout=out)
+        self.assertIn("Built 4 variants for 1 images", out.getvalue())
+        user.refresh_from_db()
+        self.assertTrue(user.avatar_variants_ready)
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, "thumbs", "avatars", "default.jpg.small.webp")))
+
+        out = StringIO()
+        call_command("build_thumbnails", workers=1, missing_only=True, stdout=out)
+        self.assertIn("Built 0 variants for 0 images", out.getvalue())
+
+    def test_backfill_survives_failing_image(self):
+        def generate(name):
+            if name == "category_images/bomb.png":
+                raise Image.DecompressionBombError("too many pixels")
+            return 4
+
+        Category.objects.bulk_create([
+            Category(name="Bomb", slug="bomb", image="category_images/bomb.png"),
+            Category(name="Phones", slug="phones", image="category_images/phones.png"),
+        ])
+        out = StringIO()
+        with mock.patch("apps.common.thumbnails.generate_variants", side_effect=generate), \
+                self.assertLogs("apps.thumbnails", "ERROR"):
+            call_command("build_thumbnails", workers=1, stdout=out)
+        self.assertIn("Built 4 variants for 1 images (1 missing, unreadable or failed)", out.getvalue())
+        self.assertEqual(
+            dict(Category.objects.values_list("slug", "image_variants_ready")), {"bomb": False, "phones": True}
+        )
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class CheckoutStockTests(TestCase):
+    def setUp(self):
+        self.user, self.shipping = create_buyer(0)
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.phone = Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=category, in_stock=3)
+        self.case = Product.objects.create(name="Case", desc="desc", price_current="2.00", category=category, in_stock=1)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post("/shop/checkout/", {"shipping_id": str(self.shipping.id)})
+
+    def test_checkout_decrements_stock(self):
+        OrderItem.objects.create(user=self.user, product=self.phone, quantity=2)
+        OrderItem.objects.create(user=self.user, product=self.case, quantity=1)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 200)
+        self.phone.refresh_from_db()
+        self.case.refresh_from_db()
+        self.assertEqual((self.phone.in_stock, self.case.in_stock), (1, 0))
+
+    def test_checkout_freezes_prices(self):
+        OrderItem.objects.create(user=self.user, product=self.phone, quantity=2)
+        OrderItem.objects.create(user=self.user, product=self.case, quantity=1)
+        self.assertEqual(self.checkout().status_code, 200)
+
+        self.phone.price_current = "99.00"
+        self.phone.save()
+        order = Order.objects.get()
+        self.assertEqual((order.subtotal, order.total), (Decimal("22.00"), Decimal("22.00")))
+        self.assertEqual(
+            sorted(order.orderitems.values_list("unit_price", flat=True)), [Decimal("2.00"), Decimal("10.00")]
+        )
+        self.assertEqual(order.get_cart_total, Decimal("22.00"))
+
+    def test_cart_taken_by_concurrent_checkout(self):
+        # Корзина опустела между проверкой и блокировкой: заказ не создаётся
+        with mock.patch("django.db.models.QuerySet.exists", return_value=True):
+            response = self.checkout()
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_short_line_rejects_whole_checkout(self):
+        OrderItem.objects.create(user=self.user, product=self.phone, quantity=2)
+        OrderItem.objects.create(user=self.user, product=self.case, quantity=2)
+        response = self.checkout()
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["products"], [self.case.slug])
+        self.phone.refresh_from_db()
+        self.assertEqual(self.phone.in_stock, 3)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(OrderItem.objects.filter(order=None).count(), 2)
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ConcurrentCheckoutTests(TransactionTestCase):
+    threads = 12
+    stock = 5
+
+    def setUp(self):
+        # Картинки категории нет на диске: копии для неё не строим
+        with mock.patch.object(Category, "variant_fields", ()):
+            category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.product = Product.objects.create(
+            name="Phone", desc="desc", price_current="10.00", category=category, in_stock=self.stock
+        )
+        self.buyers = []
+        for index in range(self.threads):
+            user, shipping = create_buyer(index)
+            OrderItem.objects.create(user=user, product=self.product, quantity=1)
+            self.buyers.append((user, shipping))
+
+    def test_no_oversell_under_concurrent_checkout(self):
+        barrier = threading.Barrier(self.threads)
+        statuses = []
+
+        def checkout(user, shipping):
+            client = APIClient()
+            client.force_authenticate(user)
+            barrier.wait()
+            try:
+                statuses.append(client.post("/shop/checkout/", {"shipping_id": str(shipping.id)}).status_code)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=checkout, args=buyer) for buyer in self.buyers]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.product.refresh_from_db()
+        self.assertEqual(len(statuses), self.threads)
+        self.assertEqual(statuses.count(200), self.stock)
+        self.assertEqual(statuses.count(409), self.threads - self.stock)
+        self.assertEqual(self.product.in_stock, 0)
+        self.assertEqual(Order.objects.count(), self.stock)
+
+
+RATING_FIELDS = ("rating_count", "rating_sum", "avg_rating", "rating_1", "rating_2", "rating_3", "rating_4", "rating_5")
+
+
+class ProductRatingStatsTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.phone = Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=category)
+        self.case = Product.objects.create(name="Case", desc="desc", price_current="2.00", category=category)
+        self.users = [create_buyer(index)[0] for index in range(3)]
+
+    def stats(self):
+        return list(Product._base_manager.order_by("name").values_list(*RATING_FIELDS))
+
+    def test_incremental_stats_match_rebuild(self):
+        reviews = [
+            ProductReview.objects.create(user=user, product=self.phone, rating=rating)
+            for user, rating in zip(self.users, (5, 3, 4))
+        ]
+        ProductReview.objects.create(user=self.users[0], product=self.case, rating=2)
+        # Изменение оценки, перенос на другой товар, мягкое и полное удаление
+        reviews[0].rating = 1
+        reviews[0].save()
+        reviews[1].product = self.case
+        reviews[1].save()
+        reviews[2].delete()
+        ProductReview.objects.create(user=self.users[2], product=self.phone, rating=5).hard_delete()
+
+        incremental = self.stats()
+        self.assertEqual(incremental[1][:2], (1, 1))  # Phone: одна оценка 1
+        call_command("rebuild_product_ratings", stdout=StringIO())
+        self.assertEqual(self.stats(), incremental)
+
+    def test_queryset_deletes_match_rebuild(self):
+        for user, rating in zip(self.users, (5, 3, 5)):
+            ProductReview.objects.create(user=user, product=self.phone, rating=rating)
+            ProductReview.objects.create(user=user, product=self.case, rating=rating)
+        ProductReview.objects.filter(product=self.case, rating=3).first().delete()  # уже скрыт
+
+        # Массовое мягкое и полное удаление, как в админке
+        ProductReview.objects.filter(product=self.phone, rating=5).delete()
+        ProductReview.objects.filter(product=self.case).delete(hard_delete=True)
+
+        incremental = self.stats()
+        self.assertEqual(incremental, [(0, 0, None, 0, 0, 0, 0, 0), (1, 3, 3.0, 0, 0, 1, 0, 0)])
+        call_command("rebuild_product_ratings", stdout=StringIO())
+        self.assertEqual(self.stats(), incremental)
+
+
+class DatasetCommandTests(TransactionTestCase):
+    # Транзакционный тест: процессы пула пишут в файл тестовой БД через свои соединения
+    SIZES = {"products": "30", "users": "10", "orders": "12", "reviews": "20"}
+
+    def counts(self):
+        return {
+            model.__name__: model._base_manager.count()
+            for model in (User, Seller, Category, Product, Order, ProductReview)
+        }
+
+    def test_seed_data(self):
+        expected = {"User": 10, "Seller": 2, "Category": 50, "Product": 30, "Order": 12, "ProductReview": 20}
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                out = StringIO()
+                call_command("seed_data", flush=True, batch_size=8, workers=workers, stdout=out, **self.SIZES)
+                self.assertEqual(self.counts(), expected)
+                self.assertRegex(out.getvalue(), r"products: 30 in \d+\.\ds")
+                self.assertIn("every user's password is 'bench-password'", out.getvalue())
+                # Суммы заказов и рейтинги досчитаны в finalize()
+                self.assertFalse(Order.objects.filter(subtotal__isnull=True).exists())
+                self.assertEqual(sum(Product._base_manager.values_list("rating_count", flat=True)), 20)
+                if workers == 1:
+                    first_ids = set(Product._base_manager.values_list("id", flat=True))
+        # Ключи не зависят от числа процессов
+        self.assertEqual(set(Product._base_manager.values_list("id", flat=True)), first_ids)
+
+    def test_bench_endpoints_report(self):
+        command = BenchEndpointsCommand(stdout=StringIO())
+        command.prepare_dataset(30, 42)
+        results = command.run_scenarios({"seed": 42, "warmup": 1, "requests": 3})
+        self.assertEqual(
+            [row["endpoint"] for row in results],
+            ["products_page", "products_cursor", "cart_get", "cart_add", "checkout", "seller_orders"],
+        )
+        for row in results:
+            self.assertEqual((row["requests"], row["errors"]), (3, 0), row)
+            self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+
+        out = StringIO()
+        command.stdout = OutputWrapper(out)
+        command.print_report(results, {"cart_get": results[2]})
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertRegex(lines[0], r"^products_page +p50= *[\d.]+ms p95= *[\d.]+ms p99= *[\d.]+ms +[\d.]+ req/s")
+        self.assertIn("x vs baseline", lines[2])
+
+
+class FastSerializerTests(TestCase):
+    def test_fast_path_matches_plain_drf_json(self):
+        rows = BenchSerializersCommand().build_rows(10)
+        cases = [
+            (ProductSerializer, rows["products"]),
+            (OrderItemSerializer, rows["items"]),
+            (OrderSerializer, rows["orders"]),
+            (CheckItemOrderSerializer, rows["items"]),
+        ]
+        for serializer_class, instances in cases:
+            with self.subTest(serializer_class.__name__):
+                self.assertEqual(
+                    JSONRenderer().render(serializer_class(instances, many=True).data),
+                    JSONRenderer().render(drf_baseline(serializer_class)(instances, many=True).data),
+                )
+
+
+@override_settings(CART_BACKEND="apps.shop.carts.CacheCart", QUERY_COUNT_STRICT=True)
+class CacheCartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.phone = Product.objects.create(name="Phone", desc="desc", price_current="10.00", category=category)
+        self.users = [create_buyer(index)[0] for index in range(3)]
+
+    def toggle(self, user, quantity):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.post("/shop/cart/", {"slug": self.phone.slug, "quantity": quantity})
+        self.assertIn(response.status_code, (200, 201))
+
+    def flush(self):
+        out = StringIO()
+        call_command("flush_carts", stdout=out)
+        return out.getvalue()
+
+    def test_flush_persists_every_marked_cart(self):
+        for user in self.users:
+            self.toggle(user, 1)
+        # Повторная правка уже отмеченной корзины: только поиск товара, без очереди в БД
+        with self.assertNumQueries(1):
+            self.toggle(self.users[0], 2)
+        self.assertFalse(OrderItem.objects.exists())
+
+        self.assertIn("Flushed 3 carts (0 evicted", self.flush())
+        self.assertEqual(
+            sorted(OrderItem.objects.filter(order=None).values_list("quantity", flat=True)), [1, 1, 2]
+        )
+        self.assertIn("Flushed 0 carts", self.flush())
+
+        self.toggle(self.users[1], 0)
+        self.assertIn("Flushed 1 carts", self.flush())
+        self.assertFalse(OrderItem.objects.filter(user=self.users[1]).exists())
+
+    def test_evicted_cart_is_reported(self):
+        self.toggle(self.users[0], 1)
+        self.toggle(self.users[1], 3)
+        # Вытеснение корзины и отметки из кэша не теряет запись в очереди
+        cache.delete_many([f"cart:{self.users[1].pk}", f"cart:dirty:{self.users[1].pk}"])
+
+        with self.assertLogs("apps.carts", level="WARNING") as logs:
+            self.assertIn("Flushed 1 carts (1 evicted", self.flush())
+        self.assertIn(str(self.users[1].pk), logs.output[0])
+        self.assertEqual(list(OrderItem.objects.values_list("user", "quantity")), [(self.users[0].pk, 1)])
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class CartBulkTests(TestCase):
+    def setUp(self):
+        self.user, _ = create_buyer(0)
+        category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.products = [
+            Product.objects.create(name=f"Phone {index}", desc="desc", price_current="10.00", category=category)
+            for index in range(12)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bulk(self, items):
+        return self.client.post("/shop/cart/bulk/", items, format="json")
+
+    def count_queries(self, products, quantity):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.bulk([{"slug": product.slug, "quantity": quantity} for product in products])
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_item_count(self):
+        added = (self.count_queries(self.products[:2], 1), self.count_queries(self.products[2:], 1))
+        updated = (self.count_queries(self.products[:2], 3), self.count_queries(self.products[2:], 3))
+        self.assertEqual(added[0], added[1])
+        self.assertEqual(updated[0], updated[1])
+        self.assertEqual(OrderItem.objects.filter(user=self.user, order=None, quantity=3).count(), 12)
+
+        self.count_queries(self.products[:5], 0)
+        self.assertEqual(OrderItem.objects.filter(user=self.user, order=None).count(), 7)
+
+    def test_item_limit(self):
+        items = [{"slug": self.products[0].slug, "quantity": 1}] * (CART_BULK_MAX_ITEMS + 1)
+        self.assertEqual(self.bulk(items).status_code, 400)
+        self.assertEqual(self.bulk(items[:CART_BULK_MAX_ITEMS]).status_code, 200)
+
+
+@unittest.skipUnless(connection.vendor == "sqlite", "The FTS5 index is SQLite only")
+class ProductSearchIndexTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        self.phone = Product.objects.create(
+            name="Smartphone", desc="Black case", price_current="10.00", category=self.category
+        )
+
+    def found(self, text):
+        return list(search_products(Product.objects.all(), text).values_list("name", flat=True))
+
+    def test_index_follows_writes(self):
+        self.assertEqual(self.found("smart"), ["Smartphone"])
+        self.assertEqual(self.found("black"), ["Smartphone"])
+
+        self.phone.name = "Tablet"
+        self.phone.save()
+        self.assertEqual(self.found("smart"), [])
+        self.assertEqual(self.found("tabl"), ["Tablet"])
+
+        self.phone.delete()
+        self.assertEqual(self.found("tablet"), [])
+        Product._base_manager.filter(pk=self.phone.pk).update(is_deleted=False)
+        self.assertEqual(self.found("tablet"), ["Tablet"])
+
+        Product.objects.bulk_create([
+            Product(name="Tablet stand", slug="stand", desc="", price_current="1.00", category=self.category)
+        ])
+        self.assertEqual(sorted(self.found("tablet")), ["Tablet", "Tablet stand"])
+        self.phone.hard_delete()
+        self.assertEqual(self.found("tablet"), ["Tablet stand"])
+
+    def test_rebuild_and_recreated_triggers(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            # Так выглядит индекс после пересоздания shop_product в SQLite
+            for statement in DROP_SEARCH_INDEX_SQL[:-1]:
+                cursor.execute(statement)
+        self.assertEqual(self.found("smart"), [])
+
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(self.found("smart"), ["Smartphone"])
+
+        ensure_search_index()
+        Product.objects.create(name="Smartwatch", desc="", price_current="5.00", category=self.category)
+        self.assertEqual(sorted(self.found("smart")), ["Smartphone", "Smartwatch"])
+
+
+@override_settings(QUERY_COUNT_STRICT=True)
+class ProductFacetsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        phones = Category.objects.create(name="Phones", image="category_images/phones.jpg")
+        laptops = Category.objects.create(name="Laptops", image="category_images/laptops.jpg")
+        Product.objects.create(name="Phone", desc="desc", price_current="40.00", category=phones, in_stock=2)
+        Product.objects.create(name="Phone XL", desc="desc", price_current="120.00", category=phones, in_stock=0)
+        self.laptop = Product.objects.create(name="Laptop", desc="desc", price_current="900.00", category=laptops)
+        self.client = APIClient()
+
+    def facets(self, query=""):
+        response = self.client.get(f"/shop/products/facets/{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_and_invalidation(self):
+        facets = self.facets("?max_price=500")
+        self.assertEqual(facets["total"], 2)
+        self.assertEqual(facets["categories"], [{"slug": "phones", "name": "Phones", "count": 2}])
+        # Ценовой фасет не учитывает свой фильтр, наличие - свой
+        self.assertEqual([bucket["count"] for bucket in facets["price"]], [1, 0, 1, 1, 0])
+        self.assertEqual(facets["stock"], {"in_stock": 1, "out_of_stock": 1})
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.facets("?max_price=500"), facets)
+
+        self.laptop.price_current = "450.00"
+        self.laptop.save()
+        facets = self.facets("?max_price=500")
+        self.assertEqual(facets["total"], 3)
+        self.assertEqual(facets["categories"][0], {"slug": "phones", "name": "Phones", "count": 2})
+        self.assertEqual([bucket["count"] for bucket in facets["price"]], [1, 0, 2, 0, 0])
@@ -1,15 +1,18 @@
 from django.urls import path
 
 from apps.shop.views import CategoriesView, ProductView, ProductsView, ProductsByCategoryView, ProductsBySellerView, \
-    CartView, CheckoutView, ProductReviewListView
+    ProductFacetsView, ProductsExportView, CartView, CartBulkView, CheckoutView, ProductReviewListView
 
 urlpatterns = [
     path("categories/", CategoriesView.as_view()),
     path("categories/<slug:slug>/", ProductsByCategoryView.as_view()),
     path("sellers/<slug:slug>/", ProductsBySellerView.as_view()),
     path("products/", ProductsView.as_view()),
+    path("products/facets/", ProductFacetsView.as_view()),
+    path("products/export/", ProductsExportView.as_view()),
     path("products/<slug:slug>/", ProductView.as_view()),
     path("cart/", CartView.as_view()),
+    path("cart/bulk/", CartBulkView.as_view()),
     path("checkout/", CheckoutView.as_view()),
     ####################################################################################################################
                                 # # # Далее следуют самописные маршруты # # #
@@ -1,13 +1,16 @@
-from django.db.models import Avg
+from django.db import transaction
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework.generics import ListAPIView
+from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from drf_spectacular.utils import OpenApiParameter, OpenApiTypes
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 
-from apps.common.paginations import CustomPagination
+from apps.common.exports import EXPORT_FORMATS, export_response
+from apps.common.versions import cached_on_versions, conditional_on_versions
+from apps.common.views import PaginatedListView
 from apps.common.permissions import IsSeller
 from apps.profiles.serializers import ProductReviewSerializer
 from apps.shop.serializers import CategorySerializer, ProductSerializer, OrderItemSerializer, \
@@ -15,11 +18,17 @@ from apps.shop.serializers import CategorySerializer, ProductSerializer, OrderIt
 from apps.shop.models import Category, Product
 from apps.sellers.models import Seller
 from apps.profiles.models import OrderItem, ShippingAddress, Order, ProductReview
+from apps.shop.carts import get_cart
+from apps.shop.exceptions import OutOfStock
+from apps.shop.exports import PRODUCT_EXPORT_COLUMNS, product_export_rows
+from apps.shop.facets import get_facets
 from apps.shop.filters import ProductFilter
-from apps.shop.schema_examples import PRODUCT_PARAM_EXAMPLE
+from apps.shop.schema_examples import PRODUCT_PARAM_EXAMPLE, EXPORT_PARAM_EXAMPLE
 
 tags = ["Shop"]
 
+CART_BULK_MAX_ITEMS = 100
+
 
 class CategoriesView(APIView):
     serializer_class = CategorySerializer
@@ -31,6 +40,8 @@ class CategoriesView(APIView):
         """,
         tags=tags
     )
+    @conditional_on_versions("category")
+    @cached_on_versions("category")
     def get(self, request, *args, **kwargs):
         categories = Category.objects.all()
         serializer = self.serializer_class(categories, many=True)
@@ -53,30 +64,42 @@ class CategoriesView(APIView):
             return Response(serializer.errors, status=400)
 
 
-class ProductsByCategoryView(APIView):
+class ProductsByCategoryView(PaginatedListView):
     serializer_class = ProductSerializer
+    filterset_class = ProductFilter
     permission_classes = [IsSeller]
 
+    def get_category(self, slug):
+        # Один запрос на вызов view: категория нужна и для ключа кэша, и для выборки
+        if not hasattr(self, "_category"):
+            self._category = Category.objects.get_or_none(slug=slug)
+        return self._category
+
+    def category_scope(self, request, kwargs):
+        category = self.get_category(kwargs["slug"])
+        return f"category:{category.pk if category else None}"
+
     @extend_schema(
         operation_id="category_products",
         summary="Category Products Fetch",
         description="""
             This endpoint returns all products in a particular category.
         """,
-        tags=tags
+        tags=tags,
+        parameters=PRODUCT_PARAM_EXAMPLE,
     )
+    @cached_on_versions(category_scope, "category", "seller")
     def get(self, request, *args, **kwargs):
-        category = Category.objects.get_or_none(slug=kwargs["slug"])
+        category = self.get_category(kwargs["slug"])
         if not category:
             return Response(data={"message": "Category does not exist!"}, status=404)
         products = Product.objects.select_related("category", "seller", "seller__user").filter(category=category)
-        serializer = self.serializer_class(products, many=True)
-        return Response(data=serializer.data, status=200)
+        return self.paginated_response(request, products)
 
 
-class ProductsView(APIView):
+class ProductsView(PaginatedListView):
     serializer_class = ProductSerializer
-    pagination_class = CustomPagination
+    filterset_class = ProductFilter
 
     @extend_schema(
         operation_id="all_products",
@@ -87,37 +110,79 @@ class ProductsView(APIView):
         tags=tags,
         parameters=PRODUCT_PARAM_EXAMPLE,
     )
+    @conditional_on_versions("product", "category", "seller")
+    @cached_on_versions("product", "category", "seller")
     def get(self, request, *args, **kwargs):
         products = Product.objects.select_related("category", "seller", "seller__user").all()
-        filterset = ProductFilter(request.GET, queryset=products)
-        if filterset.is_valid():
-            queryset = filterset.qs
-            paginator = self.pagination_class()
-            paginated_queryset = paginator.paginate_queryset(queryset, request)
-            serializer = self.serializer_class(paginated_queryset, many=True)
-            return paginator.get_paginated_response(serializer.data)
-        else:
+        return self.paginated_response(request, products)
+
+
+class ProductFacetsView(APIView):
+
+    @extend_schema(
+        operation_id="product_facets",
+        summary="Product Facets Fetch",
+        description="""
+            This endpoint returns product counts per category, price bucket and stock state
+            for the same filters as the product list. Counts are cached until products change.
+        """,
+        tags=tags,
+        parameters=[param for param in PRODUCT_PARAM_EXAMPLE if param.name not in ("page", "page_size", "cursor", "ordering")],
+    )
+    def get(self, request, *args, **kwargs):
+        filterset = ProductFilter(request.query_params, queryset=Product.objects.all(), request=request)
+        if not filterset.is_valid():
             return Response(filterset.errors, status=400)
+        return Response(data=get_facets(filterset), status=200)
+
 
+class ProductsExportView(APIView):
+    permission_classes = [IsAdminUser]
 
-class ProductsBySellerView(APIView):
+    @extend_schema(
+        summary="Products Export",
+        description="""
+            This endpoint streams all products as CSV or NDJSON (?export_format=, defaults to csv).
+        """,
+        tags=tags,
+        parameters=EXPORT_PARAM_EXAMPLE,
+    )
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get("export_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return Response({"message": f"Unsupported format, expected one of {list(EXPORT_FORMATS)}"}, status=400)
+        return export_response(product_export_rows(), PRODUCT_EXPORT_COLUMNS, export_format, "products")
+
+
+class ProductsBySellerView(PaginatedListView):
     serializer_class = ProductSerializer
+    filterset_class = ProductFilter
     permission_classes = [IsSeller]
 
+    def get_seller(self, slug):
+        if not hasattr(self, "_seller"):
+            self._seller = Seller.objects.get_or_none(slug=slug)
+        return self._seller
+
+    def seller_scope(self, request, kwargs):
+        seller = self.get_seller(kwargs["slug"])
+        return f"seller:{seller.pk if seller else None}"
+
     @extend_schema(
         summary="Seller Products Fetch",
         description="""
             This endpoint returns all products in a particular seller.
         """,
-        tags=tags
+        tags=tags,
+        parameters=PRODUCT_PARAM_EXAMPLE,
     )
+    @cached_on_versions(seller_scope, "category", "seller")
     def get(self, request, *args, **kwargs):
-        seller = Seller.objects.get_or_none(slug=kwargs["slug"])
+        seller = self.get_seller(kwargs["slug"])
         if not seller:
             return Response(data={"message": "Seller does not exist!"}, status=404)
         products = Product.objects.select_related("category", "seller", "seller__user").filter(seller=seller)
-        serializer = self.serializer_class(products, many=True)
-        return Response(data=serializer.data, status=200)
+        return self.paginated_response(request, products)
 
 
 class ProductView(APIView):
@@ -125,7 +190,7 @@ class ProductView(APIView):
     # permission_classes = [IsSeller]
 
     def get_object(self, slug):
-        product = Product.objects.get_or_none(slug=slug)
+        product = Product.objects.select_related("category", "seller", "seller__user").get_or_none(slug=slug)
         return product
 
     @extend_schema(
@@ -136,16 +201,14 @@ class ProductView(APIView):
         """,
         tags=tags
     )
+    @conditional_on_versions("product", "category", "seller")
     def get(self, request, *args, **kwargs):
         product = self.get_object(kwargs['slug'])
         if not product:
             return Response(data={"message": "Product does not exist!"}, status=404)
 
-        ### Логика добавления среднего рейтинга товара
-        product.avg_rating = ProductReview.objects.filter(product__slug=kwargs['slug'])\
-            .aggregate(avg_rating=Avg('rating')).get('avg_rating')
-
-        ### Поменял ProductSerializer на его наследника с полем avg_rating.
+        ### Средний рейтинг и гистограмма хранятся в самом Product (см. ProductReview.save),
+        ### поэтому CheckProductRating читает их без агрегации по отзывам.
         serializer = self.serializer_class(product)
         return Response(data=serializer.data, status=200)
 
@@ -162,9 +225,7 @@ class CartView(APIView):
         tags=tags,
     )
     def get(self, request, *args, **kwargs):
-        user = request.user
-        orderitems = OrderItem.objects.filter(user=user, order=None).select_related(
-            "product", "product__seller", "product__seller__user")
+        orderitems = get_cart(request.user).get_items()
         serializer = self.serializer_class(orderitems, many=True)
         return Response(data=serializer.data)
 
@@ -187,20 +248,14 @@ class CartView(APIView):
         product = Product.objects.select_related("seller", "seller__user").get_or_none(slug=data["slug"])
         if not product:
             return Response({"message": "No Product with that slug"}, status=404)
-        orderitem, created = OrderItem.objects.update_or_create(
-            user=user,
-            order=None,
-            product=product,
-            defaults={"quantity": quantity},
-        )
+        orderitem, created = get_cart(user).set_item(product, quantity)
         resp_message_substring = "Updated In"
         status_code = 200
         if created:
             status_code = 201
             resp_message_substring = "Added To"
-        if orderitem.quantity == 0:
+        if orderitem is None:
             resp_message_substring = "Removed From"
-            orderitem.delete()
             data = None
         if resp_message_substring != "Removed From":
             serializer = self.serializer_class(orderitem)
@@ -208,14 +263,48 @@ class CartView(APIView):
         return Response(data={"message": f"Item {resp_message_substring} Cart", "item": data}, status=status_code)
 
 
+class CartBulkView(APIView):
+    serializer_class = OrderItemSerializer
+    permission_classes = [IsSeller]
+
+    @extend_schema(
+        summary="Bulk update cart",
+        description=f"""
+            This endpoint adds/updates/removes many cart items in one request
+            (up to {CART_BULK_MAX_ITEMS} items, quantity 0 removes an item) and returns the resulting cart.
+            If any slug is unknown, nothing is changed.
+        """,
+        tags=tags,
+        request=ToggleCartItemSerializer(many=True),
+    )
+    def post(self, request, *args, **kwargs):
+        serializer = ToggleCartItemSerializer(data=request.data, many=True, max_length=CART_BULK_MAX_ITEMS)
+        serializer.is_valid(raise_exception=True)
+        # При повторе slug в запросе побеждает последнее значение
+        quantities = {item["slug"]: item["quantity"] for item in serializer.validated_data}
+
+        products = Product.objects.select_related("seller", "seller__user").in_bulk(list(quantities), field_name="slug")
+        missing = [slug for slug in quantities if slug not in products]
+        if missing:
+            return Response({"message": "No Product with that slug", "slugs": missing}, status=404)
+
+        cart = get_cart(request.user)
+        cart.set_items({products[slug]: quantity for slug, quantity in quantities.items()})
+        serializer = self.serializer_class(cart.get_items(), many=True)
+        return Response(data={"message": "Cart Updated", "items": serializer.data}, status=200)
+
+
 class CheckoutView(APIView):
     serializer_class = CheckoutSerializer
     permission_classes = [IsSeller]
+    # Один условный UPDATE остатка на позицию корзины - намеренно (см. Product.take_from_stock)
+    query_repeat_limit = None
 
     @extend_schema(
         summary="Checkout",
         description="""
                This endpoint allows a user to create an order through which payment can then be made through.
+               Stock of every cart item is reserved atomically: if any item is short, nothing is ordered (409).
                """,
         tags=tags,
         request=CheckoutSerializer,
@@ -223,6 +312,9 @@ class CheckoutView(APIView):
     def post(self, request, *args, **kwargs):
         # Proceed to checkout
         user = request.user
+        cart = get_cart(user)
+        # Кэш-корзина записывает позиции в OrderItem только сейчас
+        cart.persist()
         orderitems = OrderItem.objects.filter(user=user, order=None)
         if not orderitems.exists():
             return Response({"message": "No Items in Cart"}, status=404)
@@ -250,8 +342,27 @@ class CheckoutView(APIView):
             value = getattr(shipping, field)
             data[field] = value
 
-        order = Order.objects.create(user=user, **data)
-        orderitems.update(order=order)
+        with transaction.atomic():
+            # Списываем остатки условными UPDATE: при нехватке хоть по одной позиции
+            # исключение откатывает всю транзакцию, включая уже списанное.
+            # Порядок по product_id одинаков для всех покупателей - без взаимных блокировок.
+            lines = list(orderitems.order_by("product_id").values_list(
+                "id", "product_id", "product__slug", "quantity", "product__category_id", "product__seller_id"
+            ))
+            if not lines:
+                # Параллельное оформление успело забрать корзину после проверки выше
+                return Response({"message": "No Items in Cart"}, status=400)
+            out_of_stock = [
+                slug for _, product_id, slug, quantity, category_id, seller_id in lines
+                if not Product.take_from_stock(product_id, quantity, category_id, seller_id)
+            ]
+            if out_of_stock:
+                raise OutOfStock(out_of_stock)
+            order = Order.objects.create(user=user, **data)
+            OrderItem.objects.filter(id__in=[line[0] for line in lines]).update(order=order)
+            # Фиксируем цены позиций и суммы, чтобы заказ не зависел от будущих правок цены
+            order.freeze_totals()
+        cart.clear()
 
         serializer = OrderSerializer(order)
         return Response(data={"message": "Checkout Successful", "item": serializer.data}, status=200)
@@ -275,4 +386,4 @@ class ProductReviewListView(ListAPIView):
     def get_queryset(self):
         return (ProductReview.objects.filter(
             product__slug=self.kwargs[self.lookup_url_kwarg])
-            .select_related('user', 'product'))
\ No newline at end of file
+            .select_related('user', 'product__category', 'product__seller__user'))
\ No newline at end of file
@@ -63,6 +63,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.common.middleware.QueryCountMiddleware',
 ]
 
 
@@ -97,6 +98,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # BEGIN IMMEDIATE: конкурирующие транзакции (оформление заказа) ждут блокировку записи
+        # до timeout секунд, а не падают с "database is locked" при повышении блокировки
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # Файловая тестовая БД: in-memory SQLite с shared cache не поддерживает
+        # конкурентные транзакции из потоков (см. apps/shop/tests.py)
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -134,7 +146,7 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.accounts.authentication.ClaimsJWTAuthentication',
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',   # New
@@ -165,4 +177,54 @@ SIMPLE_JWT = {
     'BLACKLIST_AFTER_ROTATION': True,
     'ACCESS_TOKEN_LIFETIME': timedelta(days=7),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=30),
-}
\ No newline at end of file
+}
+
+# Права проверяются по claims токена; версия claims пользователя кэшируется.
+# С локальным кэшем другие процессы увидят смену прав не позже чем через таймаут
+AUTH_CLAIMS_CACHE_ALIAS = 'default'
+AUTH_CLAIMS_CACHE_TIMEOUT = 60
+# Снимок пользователя с продавцом (ключ - id пользователя и версия claims).
+# Сбрасывается при сохранении User/Seller; с локальным кэшем - только в своём процессе
+AUTH_USER_CACHE_TIMEOUT = 60 * 5
+
+# Фильтр Блума перед чёрным списком refresh-токенов (apps.accounts.blacklist):
+# в таблицу идём только при вероятном попадании, фильтр пересобирается раз в интервал.
+# Без общего кэша (Redis/Memcached) каждая проверка догружает новые строки таблицы по id
+TOKEN_BLACKLIST_FILTER_CACHE_ALIAS = 'default'
+TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL = 60 * 10
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.01
+
+
+# Хранилище корзины: apps.shop.carts.DatabaseCart (OrderItem в БД) или
+# apps.shop.carts.CacheCart (кэш Django с отложенной записью в OrderItem)
+CART_BACKEND = 'apps.shop.carts.DatabaseCart'
+CART_CACHE_ALIAS = 'default'
+CART_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Кэш фасетов каталога, сбрасывается при любых изменениях товаров
+FACETS_CACHE_ALIAS = 'default'
+FACETS_CACHE_TIMEOUT = 60 * 10
+
+# Счётчики версий таблиц каталога (apps.common.versions) для ETag/Last-Modified.
+# При нескольких процессах нужен общий кэш, иначе запись в одном процессе не видна другим:
+# check --deploy отклоняет LocMemCache для этого алиаса (apps.common.checks)
+VERSIONS_CACHE_ALIAS = 'default'
+# Кэш ответов списков каталога (ключ - URL и версии), только первые страницы
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 60 * 5
+RESPONSE_CACHE_MAX_PAGE = 3
+
+# Уменьшенные копии картинок (apps.common.thumbnails): размеры вписываются в рамку,
+# файлы thumbs/<имя оригинала>.<size>.webp / .jpg в MEDIA_ROOT
+THUMBNAIL_SIZES = {'small': (160, 160), 'medium': (480, 480)}
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+# Копии строятся сразу, без пула потоков (тесты включают через override_settings)
+THUMBNAIL_EAGER = False
+
+# Счётчик SQL-запросов на запрос (apps.common.middleware.QueryCountMiddleware).
+# В строгом режиме повтор одного запроса больше лимита - ошибка (N+1); тесты API
+# включают его через override_settings
+QUERY_COUNT_PATH_PREFIXES = ('/shop/', '/profiles/', '/sellers/')
+QUERY_COUNT_REPEAT_LIMIT = 10
+QUERY_COUNT_STRICT = False